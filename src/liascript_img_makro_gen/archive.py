@@ -0,0 +1,204 @@
+import struct
+import tarfile
+import zipfile
+from pathlib import Path, PurePosixPath
+
+
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".zip")
+
+# general purpose flag of zip members whose name is stored as UTF-8
+ZIP_UTF8_FLAG = 0x800
+# extra field of Info-ZIP that holds the UTF-8 name of a member
+ZIP_UNICODE_PATH_FIELD = 0x7075
+
+
+def is_archive(path) -> bool:
+    """Check if the path names a tar or zip archive based on its extension."""
+    name = Path(path).name.lower()
+    return any(name.endswith(suffix) for suffix in ARCHIVE_SUFFIXES)
+
+
+def zip_member_name(info: zipfile.ZipInfo) -> str:
+    """
+    Returns the name of a zip member as it is named in the extracted tree.
+
+    zipfile decodes names without the UTF-8 flag as cp437, but Info-ZIP and most other
+    tools on Linux and macOS store UTF-8 names without setting the flag. The name of the
+    Unicode Path extra field is preferred, otherwise the raw name is decoded as UTF-8
+    if possible.
+
+    :param info: The member.
+    :return: The decoded member name.
+    """
+    if info.flag_bits & ZIP_UTF8_FLAG:
+        return info.filename
+    raw = info.orig_filename.encode("cp437")
+    extra = info.extra
+    while len(extra) >= 4:
+        field, length = struct.unpack("<HH", extra[:4])
+        data = extra[4:4 + length]
+        # version 1, CRC32 of the raw name, UTF-8 name; the CRC detects names changed by other tools
+        if field == ZIP_UNICODE_PATH_FIELD and len(data) >= 5 and data[0] == 1 \
+                and struct.unpack("<I", data[1:5])[0] == zipfile.crc32(raw):
+            try:
+                return data[5:].decode("utf-8")
+            except UnicodeDecodeError:
+                break
+        extra = extra[4 + length:]
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return info.filename
+
+
+class ArchiveIndex:
+    """
+    In-memory index of the members of a tar or zip archive.
+
+    Only the member names and sizes are read. The payload of members named like the
+    license file is kept as well, so no image data is ever extracted.
+    """
+
+    def __init__(self, archive_path, license_name: str = "LICENSE"):
+        """
+        Reads the member index of the archive.
+
+        :param archive_path: Path to a .tar, .tar.gz, .tgz or .zip file.
+        :param license_name: File name of the license members whose content is kept.
+        """
+        self.archive_path = Path(archive_path)
+        self.license_name = license_name
+        # directory parts -> {child name: size or None for directories}
+        self.children = {(): {}}
+        self.texts = {}
+
+        # the suffix selects the reader, a tar whose last member is a zip also passes is_zipfile
+        if self.archive_path.name.lower().endswith(".zip"):
+            self._read_zip()
+        elif is_archive(self.archive_path):
+            self._read_tar()
+        else:
+            raise ValueError(f"Unsupported archive format: {self.archive_path}")
+
+    def _add(self, name: str, size, is_dir: bool):
+        parts = tuple(p for p in PurePosixPath(name).parts if p not in ("/", "."))
+        if not parts or ".." in parts:
+            return None
+        # register implicit parent directories
+        for depth in range(len(parts) - 1):
+            self._add_dir(parts[:depth + 1])
+        if is_dir:
+            self._add_dir(parts)
+        else:
+            self.children[parts[:-1]][parts[-1]] = size
+        return parts
+
+    def _add_dir(self, parts: tuple):
+        if parts not in self.children:
+            self.children[parts] = {}
+            self.children[parts[:-1]][parts[-1]] = None
+
+    def _read_tar(self):
+        # stream mode reads the archive front to back once, compressed or not
+        with tarfile.open(self.archive_path, mode="r|*") as tar:
+            for member in tar:
+                if member.isdir():
+                    self._add(member.name, None, True)
+                elif member.isfile():
+                    parts = self._add(member.name, member.size, False)
+                    if parts and parts[-1] == self.license_name:
+                        self.texts[parts] = tar.extractfile(member).read()
+
+    def _read_zip(self):
+        with zipfile.ZipFile(self.archive_path) as archive:
+            for info in archive.infolist():
+                parts = self._add(zip_member_name(info), info.file_size, info.is_dir())
+                if parts and not info.is_dir() and parts[-1] == self.license_name:
+                    self.texts[parts] = archive.read(info)
+
+    def root(self, name: str, subfolder: str = "") -> "ArchivePath":
+        """
+        Returns the node that acts as the image folder.
+
+        :param name: Name reported for the root node, usually the configured image_folder.
+        :param subfolder: Optional folder inside the archive that holds the images.
+        :return: An ArchivePath for the root of the image tree.
+        """
+        base = tuple(p for p in PurePosixPath(subfolder).parts if p not in ("/", "."))
+        if base not in self.children:
+            raise ValueError(f"Folder '{subfolder}' not found in archive {self.archive_path}")
+        return ArchivePath(self, name, base, ())
+
+
+class ArchivePath:
+    """
+    A read-only, pathlib-like view on a node of an ArchiveIndex.
+
+    Supports the subset of the Path interface used while scanning the image folder.
+    The parts start with the root name so that they look like the parts of the
+    extracted tree below the image folder.
+    """
+
+    def __init__(self, index: ArchiveIndex, root_name: str, base: tuple, rel: tuple):
+        self._index = index
+        self._root_name = root_name
+        self._base = base
+        self._rel = rel
+
+    @property
+    def _key(self) -> tuple:
+        return self._base + self._rel
+
+    @property
+    def name(self) -> str:
+        return self._rel[-1] if self._rel else self._root_name
+
+    @property
+    def parts(self) -> tuple:
+        return (self._root_name,) + self._rel
+
+    def __truediv__(self, name: str) -> "ArchivePath":
+        return ArchivePath(self._index, self._root_name, self._base, self._rel + (name,))
+
+    def __repr__(self):
+        return f"ArchivePath({self._index.archive_path}:{'/'.join(self.parts)})"
+
+    def _entry(self):
+        if not self._rel:
+            return None
+        return self._index.children.get(self._key[:-1], {}).get(self._key[-1], False)
+
+    def exists(self) -> bool:
+        return not self._rel or self._entry() is not False
+
+    def is_dir(self) -> bool:
+        return self._key in self._index.children
+
+    def is_symlink(self) -> bool:
+        # symlink members are not indexed
+        return False
+
+    def is_file(self) -> bool:
+        entry = self._entry()
+        return entry is not None and entry is not False
+
+    def size(self) -> int:
+        """Returns the uncompressed size of a file member."""
+        if not self.is_file():
+            raise FileNotFoundError(repr(self))
+        return self._entry()
+
+    def iterdir(self):
+        if not self.is_dir():
+            raise NotADirectoryError(repr(self))
+        for name in self._index.children[self._key]:
+            yield self / name
+
+    def read_bytes(self) -> bytes:
+        try:
+            return self._index.texts[self._key]
+        except KeyError:
+            raise FileNotFoundError(f"{self!r} is not indexed with its content") from None
+
+    def read_text(self, encoding: str = "utf-8") -> str:
+        return self.read_bytes().decode(encoding)
@@ -0,0 +1,177 @@
+import base64
+import hashlib
+import json
+import math
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".bmp": "image/bmp",
+    ".webp": "image/webp",
+    ".svg": "image/svg+xml",
+}
+
+
+def image_size(data: bytes):
+    """
+    Reads the pixel size from the header of a PNG, GIF, BMP, WebP or JPEG image.
+
+    :param data: The content of the image file.
+    :return: A tuple (width, height) or None if the format is not recognized.
+    """
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        return struct.unpack("<HH", data[6:10])
+    if data[:2] == b"BM" and len(data) >= 26:
+        width, height = struct.unpack("<ii", data[18:26])
+        return width, abs(height)
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    if data[:2] == b"\xff\xd8":
+        position = 2
+        while position + 9 < len(data):
+            if data[position] != 0xFF:
+                position += 1
+                continue
+            marker = data[position + 1]
+            # start of frame markers carry the size, except DHT, JPG and DAC
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[position + 5:position + 9])
+                return width, height
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                position += 2
+                continue
+            position += 2 + struct.unpack(">H", data[position + 2:position + 4])[0]
+    return None
+
+
+def pack(sizes: dict) -> tuple:
+    """
+    Places rectangles into an atlas with a shelf layout. The rectangles are sorted by height
+    and put next to each other until a row reaches the width of a square of the total area.
+
+    :param sizes: A dictionary from a key to a (width, height) tuple.
+    :return: A tuple (positions, width, height) where positions maps each key to (x, y).
+    """
+    if not sizes:
+        return {}, 0, 0
+    area = sum(w * h for w, h in sizes.values())
+    row_width = max(max(w for w, _ in sizes.values()), math.ceil(math.sqrt(area)))
+    positions = {}
+    x = y = row_height = width = 0
+    for key in sorted(sizes, key=lambda k: (-sizes[k][1], -sizes[k][0], str(k))):
+        w, h = sizes[key]
+        if x + w > row_width:
+            y += row_height
+            x = row_height = 0
+        positions[key] = (x, y)
+        x += w
+        width = max(width, x)
+        row_height = max(row_height, h)
+    return positions, width, y + row_height
+
+
+def _inspect(path: Path) -> tuple:
+    data = path.read_bytes()
+    return hashlib.sha256(data).hexdigest(), image_size(data)
+
+
+class SpriteAtlas:
+    """
+    Packs the images of one category into a single SVG file that embeds them as data URIs,
+    so a course loads one file instead of one file per image.
+
+    A manifest next to the atlas keeps the content hashes of the members and the layout.
+    The atlas is only written again if a member was added, removed or changed.
+    """
+
+    def __init__(self, atlas_path: Path, max_workers: int = None):
+        """
+        :param atlas_path: Path of the SVG file to write.
+        :param max_workers: Number of threads that read and hash the images.
+        """
+        self.atlas_path = Path(atlas_path)
+        self.manifest_path = self.atlas_path.with_suffix(".json")
+        self.max_workers = max_workers
+        self.width = 0
+        self.height = 0
+        # member name -> (x, y, width, height)
+        self.regions = {}
+
+    def build(self, images: dict, write: bool = True) -> bool:
+        """
+        Builds the atlas unless the manifest shows that all members are unchanged.
+
+        :param images: A dictionary from member name to the path of the image file.
+        :param write: If False only the layout is computed, from the manifest if it is current.
+        :return: True if the atlas was written or, without write, would have been written.
+        """
+        names = list(images)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            inspected = dict(zip(names, executor.map(_inspect, (images[name] for name in names))))
+        hashes = {name: digest for name, (digest, size) in inspected.items() if size}
+
+        manifest = self._read_manifest()
+        if manifest and manifest["members"] == hashes:
+            self.width, self.height = manifest["width"], manifest["height"]
+            self.regions = {name: tuple(region) for name, region in manifest["regions"].items()}
+            return False
+
+        sizes = {name: size for name, (_, size) in inspected.items() if size}
+        positions, self.width, self.height = pack(sizes)
+        self.regions = {name: (*positions[name], *sizes[name]) for name in sizes}
+        if not write:
+            return True
+
+        self.atlas_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.atlas_path, "w", encoding="utf-8") as f:
+            f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width}" height="{self.height}" '
+                    f'viewBox="0 0 {self.width} {self.height}">\n')
+            for name in sorted(self.regions):
+                x, y, w, h = self.regions[name]
+                mime = MIME_TYPES.get(Path(images[name]).suffix.lower(), "application/octet-stream")
+                payload = base64.b64encode(Path(images[name]).read_bytes()).decode("ascii")
+                f.write(f'<image x="{x}" y="{y}" width="{w}" height="{h}" href="data:{mime};base64,{payload}"/>\n')
+            f.write("</svg>\n")
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump({"members": hashes, "width": self.width, "height": self.height, "regions": self.regions},
+                      f, indent=1, sort_keys=True)
+        return True
+
+    def _read_manifest(self):
+        if not self.atlas_path.is_file() or not self.manifest_path.is_file():
+            return None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def css_background(self, name: str) -> str:
+        """
+        Returns the CSS background that shows one member, scaled to the size of the element.
+
+        :param name: The member name.
+        :return: The value for a CSS background property.
+        """
+        x, y, w, h = self.regions[name]
+        # percentages relative to the free space keep the region aligned at any element size
+        position_x = x / (self.width - w) * 100 if self.width != w else 0
+        position_y = y / (self.height - h) * 100 if self.height != h else 0
+        return (f"{position_x:.6g}% {position_y:.6g}% / "
+                f"{self.width / w * 100:.6g}% {self.height / h * 100:.6g}% no-repeat")
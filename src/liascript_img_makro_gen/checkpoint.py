@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from liascript_img_makro_gen.tools import DocumentBuilder
+
+
+CHECKPOINT_VERSION = 2
+
+
+def config_fingerprint(config: dict) -> str:
+    """Hashes a configuration, a checkpoint is only resumed with the configuration it was written for."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class Checkpoint:
+    """
+    Keeps the rendered output of every finished folder and writes it to a state file
+    at most once per interval.
+
+    When a folder is finished its entry replaces the entries of its subfolders, so the
+    state holds each rendered line once.
+    """
+
+    def __init__(self, path, fingerprint: str, interval: float = 30.0):
+        """
+        :param path: Path of the state file.
+        :param fingerprint: Fingerprint of the configuration, see config_fingerprint.
+        :param interval: Minimum number of seconds between two writes.
+        """
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.interval = interval
+        # folder path below the image folder -> {"document": ..., "catalog": ...}
+        self.completed = {}
+        self._saved_at = time.monotonic()
+
+    def load(self) -> dict:
+        """
+        Reads the finished folders of an interrupted run.
+
+        :return: A dictionary from folder path to a tuple (DocumentBuilder, catalog entries),
+            empty if there is no state file or it was written for another configuration.
+        """
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logging.warning(f"Ignoring unreadable checkpoint {self.path}")
+            return {}
+        if state.get("version") != CHECKPOINT_VERSION or state.get("fingerprint") != self.fingerprint:
+            logging.warning(f"Ignoring checkpoint {self.path}, it was written for another configuration")
+            return {}
+        return {folder: (DocumentBuilder.from_dict(entry["document"]), entry["catalog"])
+                for folder, entry in state["completed"].items()}
+
+    def complete(self, folder: str, document: DocumentBuilder, catalog: list):
+        """
+        Records the output of a finished folder and drops the entries of its subfolders.
+
+        :param folder: Path of the folder below the image folder.
+        :param document: The lines the folder added to the makro file.
+        :param catalog: The catalog entries of the folder.
+        """
+        prefix = folder + "/"
+        for finished in [name for name in self.completed if name.startswith(prefix)]:
+            del self.completed[finished]
+        self.completed[folder] = {"document": document.to_dict(), "catalog": catalog}
+
+    def save_if_due(self):
+        if time.monotonic() - self._saved_at >= self.interval:
+            self.save()
+
+    def save(self):
+        # write to a temporary file first, so an interruption never leaves a broken state file
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"version": CHECKPOINT_VERSION, "fingerprint": self.fingerprint, "completed": self.completed},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temporary, self.path)
+        self._saved_at = time.monotonic()
+
+    def remove(self):
+        """Deletes the state file after a complete run."""
+        self.path.unlink(missing_ok=True)
+
+
+class Progress:
+    """
+    Counts processed images and finished top level folders and estimates the remaining time
+    from the images per top level folder seen so far.
+    """
+
+    def __init__(self, interval: float = 30.0):
+        """
+        :param interval: Minimum number of seconds between two reports.
+        """
+        self.interval = interval
+        self.top_total = 0
+        self.top_done = 0
+        self.files = 0
+        # images of folders restored from a checkpoint, they count for the estimate but not the rate
+        self.restored_files = 0
+        self._started = time.monotonic()
+        self._reported_at = self._started
+
+    def report(self) -> str:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        rate = self.files / elapsed
+        message = f"{self.files + self.restored_files} images, {self.top_done}/{self.top_total} folders, {rate:.1f} images/s"
+        if self.top_done and rate:
+            remaining = (self.files + self.restored_files) / self.top_done * (self.top_total - self.top_done)
+            message += f", ETA {remaining / rate:.0f}s"
+        return message
+
+    def report_if_due(self):
+        if time.monotonic() - self._reported_at >= self.interval:
+            logging.info(self.report())
+            self._reported_at = time.monotonic()
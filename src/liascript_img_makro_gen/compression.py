@@ -0,0 +1,116 @@
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional dependency, install the brotli package with pip for .br files
+    brotli = None
+
+
+def compress_gzip(data: bytes) -> bytes:
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11)
+
+
+# encoding -> (file suffix, compress function)
+ENCODINGS = {
+    "gzip": (".gz", compress_gzip),
+    "br": (".br", compress_brotli),
+}
+
+
+def check_encodings(encodings: list):
+    """Raises a ValueError for unknown encodings and for br without the brotli package."""
+    for encoding in encodings:
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown compression '{encoding}', use one of: {', '.join(ENCODINGS)}")
+        if encoding == "br" and brotli is None:
+            raise ValueError("Compression 'br' requires the brotli package.")
+
+
+class CompressedOutputs:
+    """
+    Writes compressed siblings (e.g. makros.md.gz) of output files on a background thread,
+    so the next output can be rendered in the meantime.
+    """
+
+    def __init__(self, encodings: list):
+        """
+        :param encodings: The encodings to write, keys of ENCODINGS.
+        """
+        check_encodings(encodings)
+        self.encodings = encodings
+        # output name -> {encoding: compressed size}
+        self.sizes = {}
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._futures = []
+
+    def submit(self, path: Path, name: str):
+        """
+        Compresses a written output file in the background.
+
+        :param path: Path of the file.
+        :param name: Name of the output in the sizes, e.g. the path relative to the working directory.
+        """
+        self._futures.append(self._executor.submit(self._compress, Path(path), name))
+
+    def _compress(self, path: Path, name: str):
+        data = path.read_bytes()
+        sizes = {}
+        for encoding in self.encodings:
+            suffix, compress = ENCODINGS[encoding]
+            compressed = compress(data)
+            path.with_name(path.name + suffix).write_bytes(compressed)
+            sizes[encoding] = len(compressed)
+        self.sizes[name] = sizes
+
+    def close(self) -> dict:
+        """
+        Waits for all compressions and raises the first error.
+
+        :return: The compressed sizes per output and encoding.
+        """
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self._executor.shutdown()
+        return self.sizes
+
+
+def load_size_baseline(path: Path) -> dict:
+    """Reads a size baseline, a missing file is an empty baseline."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_size_baseline(sizes: dict, path: Path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(sizes, f, indent=2, sort_keys=True)
+
+
+def size_regressions(sizes: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compares compressed sizes with a baseline.
+
+    :param sizes: The current sizes per output and encoding.
+    :param baseline: The recorded sizes per output and encoding.
+    :param threshold: Allowed relative growth, e.g. 0.1 for 10 percent.
+    :return: A message for every output and encoding that grew by more than the threshold.
+    """
+    messages = []
+    for name in sorted(sizes):
+        for encoding, size in sorted(sizes[name].items()):
+            recorded = baseline.get(name, {}).get(encoding)
+            if recorded is not None and size > recorded * (1 + threshold):
+                messages.append(f"{name} ({encoding}) grew from {recorded} to {size} bytes")
+    return messages
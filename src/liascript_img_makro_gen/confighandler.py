@@ -4,6 +4,14 @@ from pathlib import Path
 
 import yaml
 
+from liascript_img_makro_gen.archive import is_archive
+from liascript_img_makro_gen.compression import check_encodings
+from liascript_img_makro_gen.gitinfo import head_commit
+
+PIN_MODES = ("", "commit", "file")
+SYMLINK_POLICIES = ("follow", "skip", "alias")
+VALIDATION_MODES = ("", "flag", "exclude")
+
 class ConfigLoader:
     def __init__(self, config_path="config.yaml"):
         """
@@ -36,6 +44,28 @@ class ConfigLoader:
             "makro_file": "makros.md",
             "image_folder": "img",
             "how_to_use": "",
+            "image_archive": "",
+            "image_archive_root": "",
+            "search_index_file": "",
+            "snapshot_file": "",
+            "documentation_file": "",
+            "payload_report_file": "",
+            "budget_image_bytes": 0,
+            "budget_category_bytes": 0,
+            "budget_course_bytes": 0,
+            "compress_outputs": [],
+            "size_baseline_file": "",
+            "size_regression_threshold": 0.1,
+            "branch": "main",
+            "pin_urls": "",
+            "symlinks": "follow",
+            "atlas_categories": [],
+            "atlas_folder": "atlas",
+            "validate_images": "",
+            "validation_cache": "",
+            "sources": [],
+            "checkpoint_file": "",
+            "checkpoint_interval": 30,
             "image_extensions": [".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tiff", ".webp"]
         }
 
@@ -45,7 +75,35 @@ class ConfigLoader:
 
         config_data = ConfigLoader.__ensure_validity(config_data)
         config_data = ConfigLoader.__process_makros_setup(config_data)
-        config_data["raw_image_folder"] = self.generate_raw_location(config_data["repository"], config_data["image_folder"])
+        config_data = ConfigLoader.__process_sources(config_data)
+        for source in [config_data, *config_data["sources"]]:
+            source["raw_ref"] = f"refs/heads/{source['branch']}"
+            if config_data["pin_urls"] == "commit":
+                # pin the image urls to the checked out commit of the local repository holding the images
+                source["raw_ref"] = head_commit(Path.cwd() / source["image_folder"])
+            source["raw_image_folder"] = self.generate_raw_location(
+                source["repository"], source.get("repository_folder", source["image_folder"]), source["raw_ref"])
+        return config_data
+
+    @staticmethod
+    def __process_sources(config_data: dict) -> dict:
+        # Fill every entry of 'sources' with the values of the main configuration
+        sources = []
+        for source in config_data["sources"]:
+            if not isinstance(source, dict) or not source.get("image_folder"):
+                raise ValueError("Every entry of 'sources' must provide an 'image_folder'.")
+            # the local folder may be anywhere, the folder inside the repository is relative to its root
+            repository_folder = Path(source.get("repository_folder", source["image_folder"]))
+            if repository_folder.root != '':
+                repository_folder = repository_folder.relative_to(repository_folder.anchor)
+            sources.append({
+                "image_folder": str(source["image_folder"]),
+                "repository": source.get("repository", config_data["repository"]),
+                "branch": source.get("branch", config_data["branch"]),
+                "repository_folder": repository_folder.as_posix(),
+                "category_prefix": source.get("category_prefix", ""),
+            })
+        config_data["sources"] = sources
         return config_data
 
     @staticmethod
@@ -54,12 +112,42 @@ class ConfigLoader:
         if not config_data.get("repository"):
             raise ValueError("The 'repository' key must be provided in the configuration.")
 
-        # Strip leading slashes from  'makro_file' and 'image_folder'
-        keys = ["makro_file", "image_folder"]
+        # Strip leading slashes from the repository relative paths
+        keys = ["makro_file", "image_folder", "search_index_file", "snapshot_file", "atlas_folder", "documentation_file",
+                "payload_report_file", "size_baseline_file"]
         for key in keys:
+            if key not in config_data:
+                continue
             path_key = Path(config_data[key])
             if path_key.root != '':
-                config_data[key] = path_key.relative_to("/")
+                config_data[key] = path_key.relative_to("/").as_posix()
+
+        # an image archive replaces scanning the image_folder on disk
+        if config_data.get("image_archive") and not is_archive(config_data["image_archive"]):
+            raise ValueError("The 'image_archive' key must point to a .tar, .tar.gz, .tgz or .zip file.")
+
+        # sources replace the image_folder, the archive would be ignored
+        if config_data.get("image_archive") and config_data.get("sources"):
+            raise ValueError("The 'sources' key can not be combined with 'image_archive'.")
+
+        # atlases and validation read the image content, which is not extracted from archives
+        if config_data.get("image_archive") and config_data.get("atlas_categories"):
+            raise ValueError("The 'atlas_categories' key can not be combined with 'image_archive'.")
+        if config_data.get("image_archive") and config_data.get("validate_images"):
+            raise ValueError("The 'validate_images' key can not be combined with 'image_archive'.")
+        if config_data.get("validate_images") not in (None, *VALIDATION_MODES):
+            raise ValueError("The 'validate_images' key must be empty, 'flag' or 'exclude'.")
+
+        # per file pins ask git about the image files, which are not on disk with an archive
+        if config_data.get("image_archive") and config_data.get("pin_urls") == "file":
+            raise ValueError("The 'pin_urls' value 'file' can not be combined with 'image_archive'.")
+        if config_data.get("pin_urls") not in (None, *PIN_MODES):
+            raise ValueError("The 'pin_urls' key must be empty, 'commit' or 'file'.")
+
+        if config_data.get("symlinks") not in (None, *SYMLINK_POLICIES):
+            raise ValueError("The 'symlinks' key must be 'follow', 'skip' or 'alias'.")
+
+        check_encodings(config_data.get("compress_outputs", []))
 
         # ensure that all image_extensions are lowercase
         config_data["image_extensions"] = ["." + e.lower() if not e.startswith('.') else e.lower() for e in config_data["image_extensions"]]
@@ -98,13 +186,14 @@ class ConfigLoader:
         return config_data
 
     @staticmethod
-    def generate_raw_location(repository_url: str, makro_file: str) -> str:
+    def generate_raw_location(repository_url: str, makro_file: str, ref: str = "refs/heads/main") -> str:
         """
         Converts a GitHub repository URL (e.g. https://github.com/user/reponame/)
         into its corresponding raw URL for the makro file.
 
         :param repository_url: The GitHub repository URL.
         :param makro_file: The path to the makro file (default is "/makros.md").
+        :param ref: The branch reference or commit sha the URL points to.
         :return: The raw URL suitable to access the file.
         """
         # Remove any trailing slashes from the repository URL.
@@ -117,6 +206,5 @@ class ConfigLoader:
             raise ValueError("The provided repository URL is invalid. It must contain 'github.com/'")
 
         # Construct the raw URL.
-        # Here we assume 'refs/heads/main' is the default branch.
-        raw_url = f"https://raw.githubusercontent.com/{repo_path}/refs/heads/main/{makro_file}"
+        raw_url = f"https://raw.githubusercontent.com/{repo_path}/{ref}/{makro_file}"
         return raw_url
\ No newline at end of file
@@ -1,12 +1,24 @@
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from liascript_img_makro_gen.archive import ArchiveIndex, ArchivePath
+from liascript_img_makro_gen.atlas import SpriteAtlas
+from liascript_img_makro_gen.checkpoint import Checkpoint, Progress, config_fingerprint
+from liascript_img_makro_gen.compression import CompressedOutputs, load_size_baseline, save_size_baseline, size_regressions
 from liascript_img_makro_gen.confighandler import ConfigLoader
+from liascript_img_makro_gen.gitinfo import last_commits
+from liascript_img_makro_gen.payload import payload_report, write_payload_report
+from liascript_img_makro_gen.snapshot import macro_snapshot, save_snapshot
+from liascript_img_makro_gen.search_index import SEARCH_SNIPPET, build_search_index, write_search_index
+from liascript_img_makro_gen.validation import ImageValidator
 from liascript_img_makro_gen.tools import DocumentBuilder, is_image_file, get_sanitized_name, clean_filename
 
 
 class LiaScriptMakroGenerator:
     def __init__(self, config: dict):
+        self.config = config
         self.makro_file = DocumentBuilder()
         self.raw_image_folder = config["raw_image_folder"]
         self.ignore_dirs = config["ignore_dirs"]
@@ -16,28 +28,278 @@ class LiaScriptMakroGenerator:
         self.how_to_use = config["how_to_use"]
         self.repository = config["repository"]
         self.image_extensions = config["image_extensions"]
+        self.image_archive = config.get("image_archive", "")
+        self.image_archive_root = config.get("image_archive_root", "")
+        self.search_index_file = config.get("search_index_file", "")
+        self.snapshot_file = config.get("snapshot_file", "")
+        # a dry run scans like a normal run but writes no atlases, validation cache or checkpoint
+        self.dry_run = config.get("dry_run", False)
+        self.documentation_file = config.get("documentation_file", "")
+        self.payload_report_file = config.get("payload_report_file", "")
+        self.budget_image_bytes = config.get("budget_image_bytes", 0)
+        self.budget_category_bytes = config.get("budget_category_bytes", 0)
+        self.budget_course_bytes = config.get("budget_course_bytes", 0)
+        # filled by check_payload
+        self.payload = None
+        self.compress_outputs = config.get("compress_outputs", [])
+        self.size_baseline_file = config.get("size_baseline_file", "")
+        self.size_regression_threshold = config.get("size_regression_threshold", 0.1)
+        self.update_size_baseline = config.get("update_size_baseline", False)
+        self._compressor = None
+        # output -> {encoding: compressed size}, and the outputs that grew past the threshold
+        self.compressed_sizes = {}
+        self.size_regressions = []
+        self.branch_ref = f"refs/heads/{config.get('branch', 'main')}"
+        self.pin_urls = config.get("pin_urls", "")
+        # folder of the images inside the repository, differs from image_folder for extra sources
+        self.repository_folder = config.get("repository_folder", self.image_folder)
+        self.category_prefix = config.get("category_prefix", "")
+        self.sources = config.get("sources", [])
+        # image path after image_folder -> sha of the last commit touching it
+        self.file_commits = {}
+        # the folder all scanned paths are below
+        self._scan_root = None
+        self.symlinks = config.get("symlinks", "follow")
+        # (device, inode) of scanned folders -> (heading, makro category), and of the folders above the current one
+        self._visited = {}
+        self._ancestors = set()
+        self.atlas_categories = config.get("atlas_categories", [])
+        self.atlas_folder = config.get("atlas_folder", "atlas")
+        # atlases are written to the working tree, so like the makro file they are linked from its
+        # repository and branch, also when the images come from a source in another repository
+        self.output_repository = config.get("output_repository", self.repository)
+        self.output_ref = config.get("output_ref", self.branch_ref)
+        # image path after image_folder -> (atlas url, atlas) for images shown from an atlas
+        self._atlas_images = {}
+        # paths of the written atlases relative to the working directory
+        self.atlas_files = []
+        self.validate_images = config.get("validate_images", "")
+        self.validation_cache = config.get("validation_cache", "")
+        self._validator = None
+        # files whose content does not fit their extension
+        self.invalid_images = []
+        self.checkpoint_file = config.get("checkpoint_file", "")
+        self.checkpoint_interval = config.get("checkpoint_interval", 30)
+        self.resume = config.get("resume", False)
+        self._checkpoint = None
+        # folder path below the image folder -> (document, catalog) restored from a checkpoint
+        self._resumed = {}
+        # top level folder -> (document, catalog), only filled if keep_folder_output is set
+        self.keep_folder_output = False
+        self.folder_output = {}
+        self._progress = Progress(self.checkpoint_interval)
+        # image path after image_folder -> file size in bytes
+        self.image_sizes = {}
+        # one entry per image, filled while processing the files
+        self.catalog = []
 
     def generate_makros(self):
+        if self.compress_outputs:
+            self._compressor = CompressedOutputs(self.compress_outputs)
+
+        try:
+            self.build_document()
+
+            # generate document
+            self.save_makro_file()
+
+            if self.search_index_file:
+                self.save_search_index()
+        finally:
+            # also stops the compression thread if building or saving failed
+            compressor, self._compressor = self._compressor, None
+            if compressor is not None:
+                self.compressed_sizes = compressor.close()
+
+        if self.compress_outputs and self.size_baseline_file:
+            self.check_compressed_sizes()
+
+        if self.snapshot_file:
+            save_snapshot(macro_snapshot(self.makro_file), Path(os.getcwd()) / self.snapshot_file)
+
+        if self.payload_report_file or self.budget_image_bytes or self.budget_category_bytes or self.budget_course_bytes:
+            self.check_payload()
+
+    def check_compressed_sizes(self):
+        """
+        Compares the compressed output sizes with the recorded baseline, or records them.
+        :return: None
+        """
+        baseline_path = Path(os.getcwd()) / self.size_baseline_file
+        baseline = load_size_baseline(baseline_path)
+        if self.update_size_baseline or not baseline:
+            save_size_baseline(self.compressed_sizes, baseline_path)
+            return
+        self.size_regressions = size_regressions(self.compressed_sizes, baseline, self.size_regression_threshold)
+        for message in self.size_regressions:
+            logging.warning(f"Compressed output {message}, more than {self.size_regression_threshold:.0%}")
+
+    def _output_written(self, relative_path):
+        # compress the output in the background while the next one is rendered
+        if self._compressor is not None:
+            self._compressor.submit(Path(os.getcwd()) / relative_path, Path(relative_path).as_posix())
+
+    def check_payload(self):
+        """
+        Sums the image sizes per category and overall, logs everything over budget and writes the report.
+        :return: None
+        """
+        self.payload = payload_report(self.catalog, self.budget_image_bytes, self.budget_category_bytes,
+                                      self.budget_course_bytes)
+        for image in self.payload["images_over_budget"]:
+            logging.warning(f"Image {image['macro']} has {image['bytes']} bytes, the budget is {self.budget_image_bytes}")
+        for category in self.payload["categories"]:
+            if category["over_budget"]:
+                logging.warning(f"Category {category['category']} has {category['bytes']} bytes, "
+                                f"the budget is {self.budget_category_bytes}")
+        if self.payload["over_budget"]:
+            logging.warning(f"All images have {self.payload['total_bytes']} bytes, the budget is {self.budget_course_bytes}")
+        if self.payload_report_file:
+            write_payload_report(self.payload, Path(os.getcwd()) / self.payload_report_file)
+
+    def build_document(self):
+        """
+        Fills the makro file and the catalog in memory without writing anything.
+        :return: None
+        """
         # output pre fill
         self.makro_file.add_to_header(self.makros_setup)
 
-        self.makro_file.add_to_body(self.how_to_use.format(raw_location=ConfigLoader.generate_raw_location(self.repository, self.makro_filename)))
+        raw_location = ConfigLoader.generate_raw_location(self.repository, self.makro_filename, self.branch_ref)
+        doc_location = ConfigLoader.generate_raw_location(self.repository, self.documentation_file, self.branch_ref) \
+            if self.documentation_file else raw_location
+        self.makro_file.add_to_body(self.how_to_use.format(raw_location=raw_location, doc_location=doc_location))
 
-        # parse all image folders
-        self.process_folders()
+        if self.search_index_file:
+            index_url = ConfigLoader.generate_raw_location(self.repository, self.search_index_file, self.branch_ref)
+            self.makro_file.add_to_body(SEARCH_SNIPPET.format(index_url=index_url))
 
-        # generate document
-        self.save_makro_file()
+        # parse all image folders
+        if self.sources:
+            self.process_sources()
+        else:
+            self.process_folders()
 
     def save_makro_file(self):
         makro_path = Path(os.getcwd()) / self.makro_filename
+        if not self.documentation_file:
+            with open(makro_path, "w", encoding="utf-8") as f:
+                f.write(self.makro_file.build())
+            self._output_written(self.makro_filename)
+            return
+
+        # courses only import the makro definitions, the tables go to a separate documentation course
         with open(makro_path, "w", encoding="utf-8") as f:
-            f.write(self.makro_file.build())
+            f.write(self.makro_file.build_header())
+        makro_url = ConfigLoader.generate_raw_location(self.repository, self.makro_filename, self.branch_ref)
+        self._output_written(self.makro_filename)
+        with open(Path(os.getcwd()) / self.documentation_file, "w", encoding="utf-8") as f:
+            f.write(self.makro_file.build_documentation(makro_url))
+        self._output_written(self.documentation_file)
+
+    def save_search_index(self):
+        index_path = Path(os.getcwd()) / self.search_index_file
+        write_search_index(build_search_index(self.catalog), index_path)
+        self._output_written(self.search_index_file)
+
+    def process_sources(self):
+        """
+        Scans every configured source concurrently and merges them in the configured order.
+        Raises a ValueError if sources define the same makro or write the same atlas.
+        :return: None
+        """
+        generators = [
+            LiaScriptMakroGenerator(dict(self.config, image_archive="", **source, sources=[],
+                                         checkpoint_file=f"{self.checkpoint_file}.{index}" if self.checkpoint_file else "",
+                                         output_repository=self.repository, output_ref=self.branch_ref))
+            for index, source in enumerate(self.sources)
+        ]
+        if self.validate_images:
+            # one validator for all sources, so they share the cache file
+            self._validator = self._create_validator()
+            for generator in generators:
+                generator._validator = self._validator
+        try:
+            with ThreadPoolExecutor() as executor:
+                # list() waits for all scans and raises the first error
+                list(executor.map(LiaScriptMakroGenerator.process_folders, generators))
+        finally:
+            if self._validator is not None:
+                self._validator.close()
+                self._validator = None
+
+        # makro name or atlas file -> source, to detect makros and atlases of more than one source
+        defined = {}
+        collisions = []
+        for source, generator in zip(self.sources, generators):
+            for name in [*generator.makro_file.makro_names(), *generator.atlas_files]:
+                if name in defined:
+                    collisions.append(f"{name} ({defined[name]} and {source['image_folder']})")
+                else:
+                    defined[name] = source["image_folder"]
+        if collisions:
+            raise ValueError("Makros or atlases are defined by more than one source, set a category_prefix: "
+                             + ", ".join(collisions))
+
+        for generator in generators:
+            self.makro_file.extend(generator.makro_file)
+            self.catalog.extend(generator.catalog)
+            self.invalid_images.extend(generator.invalid_images)
 
     def process_folders(self):
-        img_path = Path(os.getcwd()) / Path(self.image_folder)
+        if self.pin_urls == "file":
+            self.file_commits = last_commits(".", Path(os.getcwd()) / self.image_folder)
 
-        self.process_folder(img_path)
+        if self.image_archive:
+            # scan the member index of the archive instead of the extracted tree
+            index = ArchiveIndex(Path(os.getcwd()) / self.image_archive)
+            img_path = index.root(str(self.image_folder), self.image_archive_root)
+        else:
+            img_path = Path(os.getcwd()) / Path(self.image_folder)
+
+        self._scan_root = img_path
+        if self.checkpoint_file and not self.dry_run:
+            # options of a single run do not change the output
+            fingerprint = config_fingerprint({key: value for key, value in self.config.items()
+                                              if key not in ("resume", "update_size_baseline")})
+            self._checkpoint = Checkpoint(Path(os.getcwd()) / self.checkpoint_file, fingerprint, self.checkpoint_interval)
+            if self.resume:
+                self._resumed = self._checkpoint.load()
+        owns_validator = self.validate_images and self._validator is None
+        if owns_validator:
+            self._validator = self._create_validator()
+
+        root_key = self._directory_key(img_path)
+        if root_key is not None:
+            self._visited[root_key] = (str(self.image_folder), self.category_prefix)
+            self._ancestors.add(root_key)
+        finished = False
+        try:
+            self.process_folder(img_path)
+            finished = True
+        finally:
+            self._ancestors.discard(root_key)
+            if self._checkpoint is not None and finished:
+                self._checkpoint.remove()
+            elif self._checkpoint is not None:
+                # keep the finished folders of an interrupted run for --resume
+                self._checkpoint.save()
+            logging.info(self._progress.report())
+            if owns_validator:
+                self._validator.close()
+                self._validator = None
+
+    def reuse_folders(self, outputs: dict):
+        """
+        Takes the output of folders from an earlier run instead of scanning them again.
+        :param outputs: folder path below the image folder -> (document, catalog), e.g. the folder_output of an earlier run
+        :return: None
+        """
+        self._resumed = dict(outputs)
+
+    def _create_validator(self) -> ImageValidator:
+        cache = self.validation_cache and not self.dry_run
+        return ImageValidator(Path(os.getcwd()) / self.validation_cache if cache else None)
 
     def process_folder(self, target: Path):
         """
@@ -47,33 +309,101 @@ class LiaScriptMakroGenerator:
         """
         operation_folder = target.name
         # parse only folders in the main image directory
-        at_top = True if operation_folder == self.image_folder else False
+        at_top = not self._relative_parts(target)
 
         # we go through all entries in path
-        folder_elements = list(target.iterdir())
+        folder_elements = self._list_folder(target)
         # sort them
-        folder_elements.sort(key=lambda p: (p.is_dir(), p.name.lower()))
-        for category in folder_elements:
-            category = category.name
+        folder_elements.sort(key=lambda e: (e.is_dir(), e.name.lower()))
+        if at_top:
+            self._progress.top_total = sum(1 for e in folder_elements if e.is_dir() and e.name not in self.ignore_dirs)
+        excluded = set()
+        if self._validator is not None or self.atlas_categories:
+            images = [target / e.name for e in folder_elements
+                      if e.is_file() and is_image_file(e.name, image_extensions=self.image_extensions)]
+            if self._validator is not None:
+                excluded = self.process_validation(images)
+                images = [p for p in images if p not in excluded]
+            if self.atlas_categories:
+                self.process_atlas(target, images)
+        for entry in folder_elements:
+            category = entry.name
             full_path = target / category
             # each of these main categories needs to be parsed for subcats and image files
-            if full_path.is_dir() and category not in self.ignore_dirs:
+            if entry.is_dir() and category not in self.ignore_dirs:
                 # directory
+                if self.symlinks == "skip" and entry.is_symlink():
+                    # skipped folders have no output, but count as finished for the progress
+                    self._progress.top_done += at_top
+                    continue
+                key = self._directory_key(full_path)
+                if key is not None and key in self._ancestors:
+                    logging.warning(f"Skipping {full_path}, it links back to a folder above it")
+                    self._progress.top_done += at_top
+                    continue
                 if not at_top:
                     # if we are not at top then add subcategory
                     category = f"{operation_folder}_{category}"
+                if self.category_prefix:
+                    category = f"{self.category_prefix}_{category}"
+                folder = "/".join(self._relative_parts(full_path))
+                # headings only join the folder with its parent, makros join the whole path like process_file
+                makro_category = "_".join((self.category_prefix, *self._relative_parts(full_path))
+                                          if self.category_prefix else self._relative_parts(full_path))
+                mark, catalog_mark = self.makro_file.mark(), len(self.catalog)
+                if folder in self._resumed:
+                    # finished before the last run was interrupted, reuse its output
+                    document, catalog = self._resumed[folder]
+                    self.makro_file.extend(document)
+                    self.catalog.extend(catalog)
+                    if key is not None:
+                        self._visited.setdefault(key, (category, makro_category))
+                    self._finish_folder(folder, at_top, mark, catalog_mark, restored=True)
+                    continue
                 # new folder, start with title and table
+                self.makro_file.start_section(category)
                 self.makro_file.add_to_body(f"\n### {category}\n")
+                if self.symlinks == "alias" and key in self._visited:
+                    # the same folder was scanned under another name, refer to it instead
+                    self.process_alias(*self._visited[key])
+                    self._finish_folder(folder, at_top, mark, catalog_mark)
+                    continue
+                if key is not None:
+                    self._visited.setdefault(key, (category, makro_category))
+                    self._ancestors.add(key)
                 # parse licence file
                 self.process_license_file(full_path, category)
                 self.makro_file.add_to_body("\n|Bild|Name|Befehl|\n|---|---|---|")
                 self.process_folder(full_path)
-            elif full_path.is_file() and is_image_file(category, image_extensions=self.image_extensions):
+                self._ancestors.discard(key)
+                self._finish_folder(folder, at_top, mark, catalog_mark)
+            elif entry.is_file() and is_image_file(category, image_extensions=self.image_extensions):
+                if full_path in excluded:
+                    continue
                 # image
-                parts = full_path.parts
-                tail = parts[parts.index(self.image_folder)+1:]
+                tail = self._relative_parts(full_path)
+                filepath = Path("/".join(tail))
+                self.image_sizes[filepath] = self._entry_size(entry)
 
-                self.process_file(Path("/".join(tail)))
+                self.process_file(filepath)
+                self._progress.files += 1
+
+    def _finish_folder(self, folder: str, at_top: bool, mark: tuple, catalog_mark: int, restored: bool = False):
+        # checkpoint the output of a finished folder and report the progress
+        keep = at_top and self.keep_folder_output
+        if self._checkpoint is not None or keep:
+            # copying the output of the folder is only needed to keep it
+            document, catalog = self.makro_file.since(mark), self.catalog[catalog_mark:]
+            if self._checkpoint is not None:
+                self._checkpoint.complete(folder, document, catalog)
+                self._checkpoint.save_if_due()
+            if keep:
+                self.folder_output[folder] = (document, catalog)
+        if restored:
+            self._progress.restored_files += len(self.catalog) - catalog_mark
+        if at_top:
+            self._progress.top_done += 1
+        self._progress.report_if_due()
 
     def process_file(self, filepath: Path):
         """
@@ -91,16 +421,118 @@ class LiaScriptMakroGenerator:
         filename = get_sanitized_name(item)
         # we join the folders above filename with _
         parent_folders = Path(filepath).parts[:-1]
-        categories = "_".join(parent_folders)
+        categories = "_".join((self.category_prefix, *parent_folders) if self.category_prefix else parent_folders)
         parents_for_url = Path(*parent_folders).as_posix()
+        raw_image_folder = self.raw_image_folder_for(filepath)
 
         self.makro_file.add_to_header("")
-        self.makro_file.add_to_header(f'@{categories}.{filename}.src: {self.raw_image_folder}/{parents_for_url}/{item}')
-        self.makro_file.add_to_header(f'@{categories}.{filename}: @diagnostik_image({self.raw_image_folder},{parents_for_url}/{item},@0)')
+        self.makro_file.add_to_header(f'@{categories}.{filename}.src: {raw_image_folder}/{parents_for_url}/{item}')
+        if filepath in self._atlas_images:
+            atlas_url, atlas = self._atlas_images[filepath]
+            x, y, width, height = atlas.regions[item]
+            self.makro_file.add_to_header(
+                f'@{categories}.{filename}: <span role="img" aria-label="{item}" style="display: inline-block; '
+                f'height: @0rem; aspect-ratio: {width} / {height}; '
+                f'background: url(\'{atlas_url}\') {atlas.css_background(item)}"></span>')
+        else:
+            self.makro_file.add_to_header(f'@{categories}.{filename}: @diagnostik_image({raw_image_folder},{parents_for_url}/{item},@0)')
 
         item_name = clean_filename(item)
         self.makro_file.add_to_body(f"|@{categories}.{filename}(10)|_{item_name}_|`@{categories}.{filename}(10)`|")
 
+        self.catalog.append({
+            "category": categories,
+            "name": filename,
+            "file": f"{parents_for_url}/{item}",
+            "title": item_name,
+            "src": f"{raw_image_folder}/{parents_for_url}/{item}",
+            "size": self.image_sizes.get(filepath),
+        })
+
+    def raw_image_folder_for(self, filepath: Path) -> str:
+        """
+        Returns the raw url of the image folder to use for a file. With pinned file urls this is
+        the folder at the last commit that touched the file, so unchanged images keep their url.
+        :param filepath: only the path with the filename after image_folder
+        :return: the raw url of the image folder
+        """
+        sha = self.file_commits.get(filepath.as_posix())
+        if sha is None:
+            return self.raw_image_folder
+        return ConfigLoader.generate_raw_location(self.repository, self.repository_folder, sha)
+
+    def process_validation(self, images: list) -> set:
+        """
+        Checks the magic bytes of the images of a folder and logs those that do not fit their extension.
+        :param images: Paths of the image files in the folder.
+        :return: the paths to leave out of the output, empty unless invalid images are excluded
+        """
+        verdicts = self._validator.validate(images)
+        invalid = [path for path in images if not verdicts[path]]
+        for path in invalid:
+            logging.warning(f"{path} is empty or its content does not match its extension")
+        self.invalid_images.extend(invalid)
+        return set(invalid) if self.validate_images == "exclude" else set()
+
+    def process_atlas(self, target: Path, images: list):
+        """
+        Packs the images of a folder into a sprite atlas if its category is selected for atlases.
+        :param target: Path of the folder.
+        :param images: Paths of the image files in the folder.
+        :return: None
+        """
+        tail = self._relative_parts(target)
+        # the category part of the makros, including the prefix of the source
+        category = "_".join((self.category_prefix, *tail) if self.category_prefix else tail)
+        if not images or category not in self.atlas_categories:
+            return
+        atlas_file = Path(self.atlas_folder, f"{category}.svg").as_posix()
+        atlas = SpriteAtlas(Path(os.getcwd()) / atlas_file)
+        atlas.build({image.name: image for image in images}, write=not self.dry_run)
+        self.atlas_files.append(atlas_file)
+        atlas_url = ConfigLoader.generate_raw_location(self.output_repository, atlas_file, self.output_ref)
+        for name in atlas.regions:
+            self._atlas_images[Path(*tail, name)] = (atlas_url, atlas)
+
+    @staticmethod
+    def _list_folder(target) -> list:
+        # DirEntry objects carry the file type and stat data, so sorting needs no extra stat calls
+        if isinstance(target, ArchivePath):
+            return list(target.iterdir())
+        with os.scandir(target) as entries:
+            return list(entries)
+
+    @staticmethod
+    def _entry_size(entry) -> int:
+        if isinstance(entry, ArchivePath):
+            return entry.size()
+        return entry.stat().st_size
+
+    def _relative_parts(self, path) -> tuple:
+        # the parts of a scanned path below the image folder
+        if self._scan_root is not None:
+            return path.parts[len(self._scan_root.parts):]
+        parts = path.parts
+        return parts[parts.index(self.image_folder) + 1:]
+
+    @staticmethod
+    def _directory_key(path):
+        # archives have no inodes and never contain followed symlinks
+        if isinstance(path, ArchivePath):
+            return None
+        stat = path.stat()
+        return stat.st_dev, stat.st_ino
+
+    def process_alias(self, heading: str, makro_category: str):
+        """
+        Writes a reference to an already scanned folder instead of its images.
+        :param heading: heading the folder was scanned under
+        :param makro_category: category part of the makros of the folder's images
+        :return: None
+        """
+        self.makro_file.add_to_body(f"Dieser Ordner verweist auf [{heading}](#{heading}), "
+                                    f"die Bilder sind dort mit `@{makro_category}.<Name>` verfügbar.")
+
     def process_license_file(self, location: Path, category: str):
         # check if there is a License File
         license_file = location / "LICENSE"
@@ -0,0 +1,109 @@
+import re
+import subprocess
+from pathlib import Path
+
+
+SHA_PATTERN = re.compile(r'^[0-9a-f]{40}([0-9a-f]{24})?$')
+
+
+def find_git_dir(start) -> Path:
+    """
+    Searches the git directory of the repository that contains start.
+    Supports worktrees and submodules where .git is a file pointing to the real directory.
+
+    :param start: A path inside the working tree.
+    :return: The path of the git directory.
+    """
+    start = Path(start).resolve()
+    for folder in (start, *start.parents):
+        candidate = folder / ".git"
+        if candidate.is_dir():
+            return candidate
+        if candidate.is_file():
+            content = candidate.read_text(encoding="utf-8").strip()
+            if content.startswith("gitdir:"):
+                return (folder / content[len("gitdir:"):].strip()).resolve()
+    raise ValueError(f"No git repository found for {start}")
+
+
+def _common_dir(git_dir: Path) -> Path:
+    # linked worktrees keep their refs in the main git directory
+    common = git_dir / "commondir"
+    if common.is_file():
+        return (git_dir / common.read_text(encoding="utf-8").strip()).resolve()
+    return git_dir
+
+
+def resolve_ref(git_dir: Path, ref: str = "HEAD") -> str:
+    """
+    Resolves a reference to a commit sha by reading the files of the git directory only.
+
+    :param git_dir: The git directory, see find_git_dir.
+    :param ref: A full reference like HEAD or refs/heads/main.
+    :return: The commit sha.
+    """
+    for _ in range(10):
+        if SHA_PATTERN.match(ref):
+            return ref
+        # HEAD is per worktree, branches are shared
+        ref_file = git_dir / ref if ref == "HEAD" else _common_dir(git_dir) / ref
+        if ref_file.is_file():
+            content = ref_file.read_text(encoding="utf-8").strip()
+            ref = content[len("ref:"):].strip() if content.startswith("ref:") else content
+            continue
+        packed = _common_dir(git_dir) / "packed-refs"
+        if packed.is_file():
+            for line in packed.read_text(encoding="utf-8").splitlines():
+                if line.startswith(("#", "^")):
+                    continue
+                sha, _, name = line.partition(" ")
+                if name == ref:
+                    return sha
+        break
+    raise ValueError(f"Could not resolve git reference '{ref}' in {git_dir}")
+
+
+def head_commit(start=".") -> str:
+    """Returns the sha of the commit that is checked out in the repository containing start."""
+    return resolve_ref(find_git_dir(start), "HEAD")
+
+
+def last_commits(folder, cwd=".") -> dict:
+    """
+    Finds the last commit that touched each tracked file below folder.
+
+    Walks the local history once with git log and stops as soon as every tracked file
+    is found, so only the history back to the oldest unchanged file is read.
+
+    :param folder: Folder relative to cwd whose files are looked up.
+    :param cwd: The working directory, paths are relative to it.
+    :return: A dictionary from the posix file path relative to cwd to the commit sha.
+    """
+    try:
+        listing = subprocess.run(
+            ["git", "ls-files", "-z", "--", str(folder)],
+            cwd=cwd, capture_output=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise ValueError(f"Could not list the tracked files of {folder}: {e}") from e
+    remaining = {path for path in listing.stdout.decode("utf-8").split("\0") if path}
+
+    commits = {}
+    if not remaining:
+        return commits
+    with subprocess.Popen(
+        ["git", "-c", "core.quotePath=false", "log", "--format=%x00%H", "--name-only", "--no-renames", "--relative", "--", str(folder)],
+        cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    ) as log:
+        sha = None
+        for raw_line in log.stdout:
+            line = raw_line.decode("utf-8").rstrip("\n")
+            if line.startswith("\0"):
+                sha = line[1:]
+            elif line in remaining:
+                commits[line] = sha
+                remaining.discard(line)
+                if not remaining:
+                    log.kill()
+                    break
+    return commits
@@ -5,9 +5,15 @@ minimal runner for keyword_extraction module
 """
 
 import argparse
+import json
+import sys
+from pathlib import Path
 
 from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
 from liascript_img_makro_gen.confighandler import ConfigLoader
+from liascript_img_makro_gen.server import MakroService, create_server
+from liascript_img_makro_gen.payload import is_over_budget
+from liascript_img_makro_gen.snapshot import diff_snapshots, has_changes, load_snapshot, macro_snapshot
 
 def main():
     parser = argparse.ArgumentParser(
@@ -19,15 +25,84 @@ def main():
         help="Path to the configuration file.",
         default="config.yaml"
     )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve the makros via HTTP instead of writing the makro file."
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address the HTTP service binds to."
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8000,
+        help="Port the HTTP service listens on."
+    )
+    parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="Compare the scan with the snapshot of the previous run, print the changed makros as JSON "
+             "and exit with 1 if there are changes. No files are written."
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from the checkpoint_file of the configuration."
+    )
+    parser.add_argument(
+        "--fail-over-budget",
+        action="store_true",
+        help="Exit with 1 if an image, a category or all images exceed the configured byte budgets."
+    )
+    parser.add_argument(
+        "--update-size-baseline",
+        action="store_true",
+        help="Record the compressed output sizes as the new size_baseline_file."
+    )
+    parser.add_argument(
+        "--fail-on-size-regression",
+        action="store_true",
+        help="Exit with 1 if a compressed output grew past size_regression_threshold."
+    )
     
     # Parse the command line arguments
     args = parser.parse_args()
+
+    if args.serve:
+        server = create_server(MakroService(args.config), args.host, args.port)
+        print(f"Serving makros on http://{args.host}:{server.server_address[1]}/makros.md")
+        server.serve_forever()
+        return
     
     # Load the configuration and generate the makros using the provided config file
     loader = ConfigLoader(args.config)
     config = loader.load_config()
+    if args.resume:
+        if not config["checkpoint_file"]:
+            parser.error("--resume requires 'checkpoint_file' in the configuration.")
+        config["resume"] = True
+    config["update_size_baseline"] = args.update_size_baseline
+
+    if args.diff:
+        if not config["snapshot_file"]:
+            parser.error("--diff requires 'snapshot_file' in the configuration.")
+        # the scan only reads, atlases, the validation cache and checkpoints are not written
+        generator = LiaScriptMakroGenerator(dict(config, dry_run=True))
+        generator.build_document()
+        report = diff_snapshots(load_snapshot(Path(config["snapshot_file"])), macro_snapshot(generator.makro_file))
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        sys.exit(1 if has_changes(report) else 0)
+
     generator = LiaScriptMakroGenerator(config)
     generator.generate_makros()
 
+    if args.fail_over_budget and generator.payload is not None and is_over_budget(generator.payload):
+        sys.exit(1)
+    if args.fail_on_size_regression and generator.size_regressions:
+        sys.exit(1)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
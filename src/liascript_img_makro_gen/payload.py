@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+
+
+def payload_report(catalog: list, image_budget: int = 0, category_budget: int = 0, course_budget: int = 0) -> dict:
+    """
+    Sums the file sizes of the catalog per category and overall and compares them with the budgets.
+
+    :param catalog: The list of catalog entries recorded by the generator.
+    :param image_budget: Maximum bytes of a single image, 0 disables the check.
+    :param category_budget: Maximum bytes of the images of one category table, 0 disables the check.
+    :param course_budget: Maximum bytes of all images, 0 disables the check.
+    :return: A JSON serializable dictionary, categories and images are sorted by size, largest first.
+    """
+    categories = {}
+    for image in catalog:
+        category = categories.setdefault(image["category"], {"category": image["category"], "bytes": 0, "images": 0})
+        category["bytes"] += image["size"] or 0
+        category["images"] += 1
+    total = sum(category["bytes"] for category in categories.values())
+
+    by_size = sorted(categories.values(), key=lambda c: (-c["bytes"], c["category"]))
+    return {
+        "total_bytes": total,
+        "budgets": {"image": image_budget, "category": category_budget, "course": course_budget},
+        "over_budget": bool(course_budget and total > course_budget),
+        "categories": [dict(c, over_budget=bool(category_budget and c["bytes"] > category_budget)) for c in by_size],
+        "images_over_budget": sorted(
+            ({"macro": f"@{image['category']}.{image['name']}", "bytes": image["size"]}
+             for image in catalog if image_budget and (image["size"] or 0) > image_budget),
+            key=lambda i: (-i["bytes"], i["macro"]),
+        ),
+    }
+
+
+def is_over_budget(report: dict) -> bool:
+    """Returns True if the course, a category or an image of a payload report exceeds its budget."""
+    return (report["over_budget"]
+            or any(category["over_budget"] for category in report["categories"])
+            or bool(report["images_over_budget"]))
+
+
+def write_payload_report(report: dict, path: Path):
+    """Writes the report as indented JSON, so it can be read in CI logs and diffs."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
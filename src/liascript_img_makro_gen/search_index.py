@@ -0,0 +1,125 @@
+import json
+import re
+from bisect import bisect_left
+from pathlib import Path
+
+from liascript_img_makro_gen.tools import clean_filename, get_sanitized_name
+
+
+# LiaScript snippet that loads the index and does prefix lookups on the sorted token list.
+SEARCH_SNIPPET = """
+## Suche
+
+<input id="makro-search" placeholder="Bild suchen ..." style="width: 100%">
+<ul id="makro-search-results"></ul>
+
+<script>
+fetch("{index_url}").then(r => r.json()).then(index => {{
+  const input = document.getElementById("makro-search");
+  const results = document.getElementById("makro-search-results");
+  const lower = (t) => {{
+    let lo = 0, hi = index.tokens.length;
+    while (lo < hi) {{ const mid = (lo + hi) >> 1; if (index.tokens[mid] < t) lo = mid + 1; else hi = mid; }}
+    return lo;
+  }};
+  const lookup = (term) => {{
+    const ids = new Set();
+    for (let i = lower(term); i < index.tokens.length && index.tokens[i].startsWith(term); i++) {{
+      index.postings[i].forEach(id => ids.add(id));
+    }}
+    return ids;
+  }};
+  input.oninput = () => {{
+    const terms = input.value.toLowerCase().split(/[^\\p{{L}}\\p{{N}}]+/u).filter(t => t);
+    let hits = null;
+    for (const term of terms) {{
+      const ids = lookup(term);
+      hits = hits === null ? ids : new Set([...hits].filter(id => ids.has(id)));
+    }}
+    // titles come from file names, textContent keeps characters like < and & as text
+    results.replaceChildren(...[...(hits || [])].slice(0, 50).map(id => {{
+      const item = document.createElement("li");
+      const code = document.createElement("code");
+      code.textContent = `${{index.entries[id][0]}}(10)`;
+      item.append(code, " " + index.entries[id][1]);
+      return item;
+    }}));
+  }};
+}});
+</script>
+"""
+
+
+def tokenize(text: str) -> set:
+    """
+    Splits a text into lowercase word tokens. Underscores, dashes and other
+    non word characters act as separators.
+
+    :param text: The text to tokenize.
+    :return: A set of tokens.
+    """
+    return {token for token in re.split(r'[\W_]+', text.lower()) if token}
+
+
+def image_tokens(image: dict) -> set:
+    """
+    Collects the search tokens of a catalog entry from its file name, its
+    umlaut normalized name and its category path.
+
+    :param image: A catalog entry as recorded by the generator.
+    :return: A set of tokens.
+    """
+    path = Path(image["file"])
+    tokens = tokenize(clean_filename(path.name)) | tokenize(get_sanitized_name(path.name))
+    for folder in path.parts[:-1]:
+        tokens |= tokenize(folder) | tokenize(get_sanitized_name(folder))
+    return tokens
+
+
+def build_search_index(catalog: list) -> dict:
+    """
+    Builds an inverted index over the catalog.
+
+    The tokens are stored sorted, so a prefix lookup is a binary search followed by
+    a scan over the adjacent tokens. Each token refers to a list of entry ids.
+
+    :param catalog: The list of catalog entries recorded by the generator.
+    :return: A JSON serializable dictionary.
+    """
+    entries = [[f"@{image['category']}.{image['name']}", image["title"]] for image in catalog]
+    inverted = {}
+    for image_id, image in enumerate(catalog):
+        for token in image_tokens(image):
+            inverted.setdefault(token, []).append(image_id)
+    tokens = sorted(inverted)
+    return {
+        "entries": entries,
+        "tokens": tokens,
+        "postings": [inverted[token] for token in tokens],
+    }
+
+
+def search(index: dict, query: str) -> list:
+    """
+    Looks up all entries that match every term of the query as a token prefix.
+
+    :param index: An index as returned by build_search_index.
+    :param query: The search text.
+    :return: The matching entries in catalog order.
+    """
+    tokens = index["tokens"]
+    hits = None
+    for term in tokenize(query):
+        ids = set()
+        position = bisect_left(tokens, term)
+        while position < len(tokens) and tokens[position].startswith(term):
+            ids.update(index["postings"][position])
+            position += 1
+        hits = ids if hits is None else hits & ids
+    return [index["entries"][image_id] for image_id in sorted(hits or ())]
+
+
+def write_search_index(index: dict, path: Path):
+    """Writes the index as compact JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,287 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from liascript_img_makro_gen.confighandler import ConfigLoader
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+
+
+class Response:
+    """A rendered resource with its strong ETag and a lazily created gzip variant."""
+
+    def __init__(self, content: bytes, content_type: str):
+        self.content = content
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(content).hexdigest()[:32] + '"'
+        self._gzipped = None
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            # mtime=0 keeps the compressed bytes deterministic
+            self._gzipped = gzip.compress(self.content, mtime=0)
+        return self._gzipped
+
+    @property
+    def gzip_etag(self) -> str:
+        # a different representation needs a different strong ETag
+        return self.etag[:-1] + '-gzip"'
+
+
+class MakroService:
+    """
+    Keeps the loaded configuration and the generated makros in memory.
+
+    The configuration file and the image tree are checked for changes at most once per
+    refresh_interval seconds. The makros are only regenerated if the configuration file,
+    a directory of the image tree, a LICENSE file or the image archive changed. Top level
+    folders of a single image_folder whose stamps did not change are taken from the last
+    render instead of being scanned again; archives and several sources are scanned completely.
+
+    Only folders and LICENSE files are stamped, so a check needs no stat call per image.
+    Replacing the content of an image under the same name therefore does not refresh the
+    sizes in /index.json until something else changes.
+    """
+
+    def __init__(self, config_path="config.yaml", refresh_interval: float = 2.0):
+        """
+        :param config_path: Path to the configuration file.
+        :param refresh_interval: Minimum number of seconds between two change checks.
+        """
+        self.config_path = config_path
+        self.refresh_interval = refresh_interval
+        self.config = None
+        self._config_stamp = None
+        # top level folder, or "" for everything else -> stamps of the last successful render
+        self._tree_stamps = None
+        # top level folder -> (document, catalog) of the last successful render
+        self._folder_output = {}
+        self._checked_at = None
+        self._responses = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Reloads the configuration and rescans the changed parts of the image tree.
+
+        :param force: Check for changes even if the refresh interval has not passed.
+        :return: True if the makros were regenerated.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._checked_at is not None and now - self._checked_at < self.refresh_interval:
+                return False
+            self._checked_at = now
+
+            config_stamp = os.stat(self.config_path).st_mtime_ns
+            if config_stamp != self._config_stamp:
+                self.config = ConfigLoader(self.config_path).load_config()
+                self._config_stamp = config_stamp
+                self._tree_stamps = None
+                self._folder_output = {}
+
+            tree_stamps = self._scan_stamps()
+            if tree_stamps == self._tree_stamps:
+                return False
+            previous = self._tree_stamps or {}
+            unchanged = {folder: output for folder, output in self._folder_output.items()
+                         if folder in tree_stamps and tree_stamps[folder] == previous.get(folder)}
+            self._responses, self._folder_output = self._render(unchanged)
+            # only a successful render is remembered, a failed one is retried with the next check
+            self._tree_stamps = tree_stamps
+            return True
+
+    def _scan_stamps(self) -> dict:
+        """
+        Collects the modification times that change when the generated output may change.
+
+        :return: A dictionary from top level folder to its stamps. The key "" holds the stamps
+            of the image folder itself, or everything if there is an archive or several sources.
+        """
+        if self.config["image_archive"]:
+            archive = Path(os.getcwd()) / self.config["image_archive"]
+            return {"": ((str(archive), archive.stat().st_mtime_ns),)}
+
+        if self.config["sources"]:
+            roots = [Path(os.getcwd()) / source["image_folder"] for source in self.config["sources"]]
+            return {"": self._stamp_tree(roots)}
+
+        root = Path(os.getcwd()) / self.config["image_folder"]
+        stamps = {"": [(str(root), root.stat().st_mtime_ns)]}
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stamps[entry.name] = self._stamp_tree([Path(entry.path)])
+                elif entry.name == "LICENSE":
+                    stamps[""].append((entry.path, entry.stat().st_mtime_ns))
+        stamps[""] = tuple(sorted(stamps[""]))
+        return stamps
+
+    @staticmethod
+    def _stamp_tree(roots: list) -> tuple:
+        stamps = []
+        seen = set()
+        pending = list(roots)
+        while pending:
+            folder = pending.pop()
+            stat = folder.stat()
+            # symlinked folders may form cycles, each folder is stamped once
+            if (stat.st_dev, stat.st_ino) in seen:
+                continue
+            seen.add((stat.st_dev, stat.st_ino))
+            stamps.append((str(folder), stat.st_mtime_ns))
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        pending.append(Path(entry.path))
+                    elif entry.name == "LICENSE":
+                        stamps.append((entry.path, entry.stat().st_mtime_ns))
+        return tuple(sorted(stamps))
+
+    def _render(self, unchanged: dict) -> tuple:
+        """
+        Generates all responses.
+
+        :param unchanged: Top level folder -> (document, catalog) to take instead of scanning the folder.
+        :return: A tuple of the responses by path and the output of every top level folder.
+        """
+        generator = LiaScriptMakroGenerator(self.config)
+        generator.keep_folder_output = True
+        generator.reuse_folders(unchanged)
+        generator.build_document()
+        document = generator.makro_file
+
+        responses = {
+            "/makros.md": Response(document.build().encode("utf-8"), "text/markdown; charset=utf-8"),
+        }
+        for category in document.sections():
+            responses[f"/categories/{category}.md"] = Response(
+                document.build_section(category, self.config["makros_setup"]).encode("utf-8"),
+                "text/markdown; charset=utf-8"
+            )
+        index = [
+            dict(image, macro=f"@{image['category']}.{image['name']}")
+            for image in generator.catalog
+        ]
+        responses["/index.json"] = Response(
+            json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            "application/json",
+        )
+        return responses, generator.folder_output
+
+    def get(self, path: str):
+        """
+        Returns the response for a request path, or None if there is none.
+        If refreshing fails, the output of the last successful refresh is returned.
+
+        :param path: The path of the request, e.g. /categories/Maler.md
+        """
+        try:
+            self.refresh()
+        except (Exception, SystemExit):
+            # load_config exits on broken YAML, keep serving the last good output instead
+            if not self._responses:
+                raise
+            logging.exception("Refreshing the makros failed, serving the previous output")
+        return self._responses.get(path)
+
+
+def accepts_encoding(header: str, encoding: str) -> bool:
+    """
+    Checks an Accept-Encoding header for an encoding, a q-value of 0 refuses it.
+
+    :param header: The value of the Accept-Encoding header.
+    :param encoding: The content coding, e.g. gzip.
+    :return: True if the client accepts the encoding.
+    """
+    # coding -> q-value, an explicit entry takes precedence over *
+    qualities = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+    return qualities.get(encoding, qualities.get("*", 0.0)) > 0
+
+
+def parse_etags(header: str) -> set:
+    """Splits an If-None-Match header into its entity tags."""
+    return {tag.strip() for tag in header.split(",") if tag.strip()}
+
+
+class MakroRequestHandler(BaseHTTPRequestHandler):
+    service: MakroService = None
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body: bool):
+        path = unquote(urlsplit(self.path).path)
+        try:
+            response = self.service.get(path)
+        except (Exception, SystemExit):
+            logging.exception(f"Generating the makros for {path} failed")
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR)
+            return
+        if response is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        use_gzip = accepts_encoding(self.headers.get("Accept-Encoding", ""), "gzip")
+        etag = response.gzip_etag if use_gzip else response.etag
+        content = response.gzipped if use_gzip else response.content
+
+        if_none_match = parse_etags(self.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Cache-Control", "no-cache")
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logging.info("%s - %s", self.address_string(), format % args)
+
+
+def create_server(service: MakroService, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+    """
+    Creates the HTTP server for a service. The makros are generated before the server is returned.
+
+    :param service: The service that holds the makros.
+    :param host: The address to bind to.
+    :param port: The port to bind to, 0 picks a free port.
+    :return: The server, call serve_forever() to run it.
+    """
+    service.refresh(force=True)
+    handler = type("BoundMakroRequestHandler", (MakroRequestHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
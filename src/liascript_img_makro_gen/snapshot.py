@@ -0,0 +1,85 @@
+import json
+from pathlib import Path
+
+from liascript_img_makro_gen.tools import DocumentBuilder
+
+
+SNAPSHOT_VERSION = 2
+# version 1 only recorded the .src URL of each image macro under the image macro name
+READABLE_VERSIONS = (1, SNAPSHOT_VERSION)
+
+
+def macro_snapshot(document: DocumentBuilder) -> dict:
+    """
+    Maps every macro defined in the header of a makro file to its definition, including
+    the .src, license and atlas macros, so any change of the makro file shows up.
+
+    :param document: The document filled by the generator.
+    :return: A dictionary from macro name to its definition.
+    """
+    return document.makro_definitions()
+
+
+def save_snapshot(snapshot: dict, path: Path):
+    """Writes the snapshot as compact JSON with sorted keys, so unchanged runs write identical files."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": SNAPSHOT_VERSION, "macros": snapshot}, f,
+                  ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+def load_snapshot(path: Path) -> dict:
+    """
+    Reads a snapshot written by save_snapshot. A missing file is an empty snapshot.
+
+    :param path: Path to the snapshot file.
+    :return: A dictionary from macro name to its definition.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if data.get("version") not in READABLE_VERSIONS:
+        raise ValueError(f"Unsupported snapshot version in {path}: {data.get('version')}")
+    return data["macros"]
+
+
+def diff_snapshots(old: dict, new: dict) -> dict:
+    """
+    Compares two snapshots in time linear to the number of macros.
+
+    A macro that disappeared while a new macro has the same definition counts as renamed,
+    a macro that kept its name but got another definition counts as changed.
+
+    :param old: The snapshot of the previous run.
+    :param new: The snapshot of the current scan.
+    :return: A dictionary with sorted lists for added, removed, renamed and changed macros.
+    """
+    removed = {name: value for name, value in old.items() if name not in new}
+    added = {name: value for name, value in new.items() if name not in old}
+
+    # definition -> removed macro, to pair removed and added macros with the same definition
+    removed_by_value = {value: name for name, value in removed.items()}
+    renamed = []
+    for name, value in added.items():
+        old_name = removed_by_value.pop(value, None)
+        if old_name is not None:
+            renamed.append({"from": old_name, "to": name, "value": value})
+    renamed_from = {entry["from"] for entry in renamed}
+    renamed_to = {entry["to"] for entry in renamed}
+
+    return {
+        "added": sorted(name for name in added if name not in renamed_to),
+        "removed": sorted(name for name in removed if name not in renamed_from),
+        "renamed": sorted(renamed, key=lambda entry: entry["from"]),
+        "changed": sorted(
+            ({"macro": name, "from": old[name], "to": value} for name, value in new.items()
+             if name in old and old[name] != value),
+            key=lambda entry: entry["macro"],
+        ),
+    }
+
+
+def has_changes(report: dict) -> bool:
+    """Returns True if a report of diff_snapshots contains any change."""
+    return any(report.values())
@@ -43,6 +43,9 @@ class DocumentBuilder:
     def __init__(self):
         self._header = []
         self._body = []
+        # (section name, header start, body start) in order, a section ends where the next one starts.
+        # Names may repeat, e.g. img/A/x/y and img/B/x/y both start a section x_y
+        self._sections = []
 
     def add_to_header(self, content: str):
         self._header.append(content)
@@ -50,9 +53,116 @@ class DocumentBuilder:
     def add_to_body(self, content: str):
         self._body.append(content)
 
-    def build(self) -> str:
-        return "\n".join(self._header) + "\n-->\n\n" + "\n".join(self._body)
+    def start_section(self, name: str):
+        """
+        Marks that the following header and body lines belong to the section name.
+        :param name: name of the section, e.g. the category
+        :return: None
+        """
+        self._sections.append((name, len(self._header), len(self._body)))
+
+    def extend(self, other: "DocumentBuilder"):
+        """
+        Appends the header, body and sections of another document.
+        :param other: the document to append
+        :return: None
+        """
+        self._sections.extend((name, len(self._header) + header_start, len(self._body) + body_start)
+                              for name, header_start, body_start in other._sections)
+        self._header.extend(other._header)
+        self._body.extend(other._body)
+
+    def mark(self) -> tuple:
+        """
+        Returns the current position, see since().
+        :return: tuple of header and body length
+        """
+        return len(self._header), len(self._body)
+
+    def since(self, mark: tuple) -> "DocumentBuilder":
+        """
+        Returns a new document with the lines and sections added after a mark.
+        :param mark: a position returned by mark()
+        :return: the new document
+        """
+        header_start, body_start = mark
+        document = DocumentBuilder()
+        document._header = self._header[header_start:]
+        document._body = self._body[body_start:]
+        document._sections = [(name, header - header_start, body - body_start)
+                              for name, header, body in self._sections
+                              if header >= header_start and body >= body_start]
+        return document
+
+    def to_dict(self) -> dict:
+        return {"header": self._header, "body": self._body, "sections": self._sections}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DocumentBuilder":
+        document = cls()
+        document._header = list(data["header"])
+        document._body = list(data["body"])
+        document._sections = [tuple(section) for section in data["sections"]]
+        return document
+
+    def makro_names(self) -> list:
+        """
+        Returns the names of all makros defined in the header, e.g. @category.name.src
+        :return: list of makro names in order of definition
+        """
+        return [line.split(":", 1)[0] for line in self._header if line.startswith("@") and ":" in line]
+
+    def makro_definitions(self) -> dict:
+        """
+        Returns the makros defined in the header with their values, e.g. the url of @category.name.src
+        :return: dictionary from makro name to its value
+        """
+        return {name: value.strip() for name, value in
+                (line.split(":", 1) for line in self._header if line.startswith("@") and ":" in line)}
+
+    def sections(self) -> list:
+        """
+        Returns the section names in order of their first start, each name once.
+        :return: list of section names
+        """
+        return list(dict.fromkeys(name for name, _, _ in self._sections))
 
+    def build(self) -> str:
+        return self.build_header() + "\n" + "\n".join(self._body)
+
+    def build_header(self) -> str:
+        """
+        Builds only the header with the makro definitions, closed by the end of the comment.
+        :return: the header
+        """
+        return "\n".join(self._header) + "\n-->\n"
+
+    def build_documentation(self, makro_url: str) -> str:
+        """
+        Builds a document with the body that imports the makros from the header file.
+        :param makro_url: url of the file written with build_header()
+        :return: the document
+        """
+        return f"<!--\nimport: {makro_url}\n-->\n\n" + "\n".join(self._body)
+
+    def build_section(self, name: str, setup: str = "<!--") -> str:
+        """
+        Builds a standalone document with the header and body lines of one section.
+        If several folders start a section with the same name, all of them are included.
+        :param name: name of the section
+        :param setup: start of the header, e.g. the makros_setup that defines the makros the section uses
+        :return: the document
+        :raises KeyError: if the section does not exist
+        """
+        if name not in self.sections():
+            raise KeyError(name)
+        ends = [(header, body) for _, header, body in self._sections[1:]] + [(len(self._header), len(self._body))]
+        header, body = [], []
+        for (section, header_start, body_start), (header_end, body_end) in zip(self._sections, ends):
+            if section == name:
+                header.extend(line for line in self._header[header_start:header_end] if line)
+                body.extend(self._body[body_start:body_end])
+        return "\n".join([setup, *header]) + "\n-->\n" + "\n".join(body)
 
 def clean_filename(filename):
     """
@@ -0,0 +1,135 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# extension -> accepted (offset, bytes) signatures, a file matches if any of them matches
+SIGNATURES = {
+    ".png": [((0, b"\x89PNG\r\n\x1a\n"),)],
+    ".jpg": [((0, b"\xff\xd8\xff"),)],
+    ".jpeg": [((0, b"\xff\xd8\xff"),)],
+    ".gif": [((0, b"GIF87a"),), ((0, b"GIF89a"),)],
+    ".bmp": [((0, b"BM"),)],
+    ".tiff": [((0, b"II*\x00"),), ((0, b"MM\x00*"),)],
+    ".tif": [((0, b"II*\x00"),), ((0, b"MM\x00*"),)],
+    ".webp": [((0, b"RIFF"), (8, b"WEBP"))],
+}
+
+# number of bytes read from every file, enough for all signatures above
+HEADER_SIZE = 16
+
+# extension -> bytes that close a complete file, truncated uploads lack them
+TRAILERS = {
+    ".png": b"IEND\xaeB`\x82",
+    ".jpg": b"\xff\xd9",
+    ".jpeg": b"\xff\xd9",
+    ".gif": b"\x00;",
+}
+
+# number of bytes read from the end of a file, some encoders pad after the trailer
+TRAILER_SIZE = 32
+
+# part of the cache keys, verdicts of an older check are not reused
+CHECK_VERSION = 2
+
+
+def matches_signature(extension: str, header: bytes) -> bool:
+    """
+    Checks the first bytes of a file against the signatures of its extension.
+    Empty files never match, extensions without known signature always match.
+
+    :param extension: The lowercase extension including the dot.
+    :param header: The first bytes of the file.
+    :return: True if the content fits the extension.
+    """
+    if not header:
+        return False
+    signatures = SIGNATURES.get(extension)
+    if signatures is None:
+        return True
+    return any(all(header[offset:offset + len(magic)] == magic for offset, magic in signature)
+               for signature in signatures)
+
+
+def matches_trailer(extension: str, tail: bytes) -> bool:
+    """
+    Checks the last bytes of a file for the trailer of its extension.
+    Extensions without known trailer always match.
+
+    :param extension: The lowercase extension including the dot.
+    :param tail: The last TRAILER_SIZE bytes of the file.
+    :return: True if the file is not truncated.
+    """
+    trailer = TRAILERS.get(extension)
+    return trailer is None or trailer in tail
+
+
+def _check(path: Path) -> bool:
+    extension = path.suffix.lower()
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+        if not matches_signature(extension, header):
+            return False
+        f.seek(max(f.seek(0, os.SEEK_END) - TRAILER_SIZE, 0))
+        return matches_trailer(extension, f.read(TRAILER_SIZE))
+
+
+class ImageValidator:
+    """
+    Validates image files by their magic bytes and trailers on a thread pool.
+
+    The verdicts are cached by path, size and modification time, optionally in a JSON file,
+    so files that did not change are not read again.
+    """
+
+    def __init__(self, cache_file=None, max_workers: int = None):
+        """
+        :param cache_file: Optional path of the JSON file that keeps the verdicts between runs.
+        :param max_workers: Number of threads that read the files.
+        """
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.max_workers = max_workers
+        self._cache = self._load_cache()
+        # threads are only started once work is submitted
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _load_cache(self) -> dict:
+        if self.cache_file is None or not self.cache_file.is_file():
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def validate(self, paths: list) -> dict:
+        """
+        Checks the given files, reading only those without a cached verdict.
+
+        :param paths: Paths of the files to check.
+        :return: A dictionary from path to True if the content fits the extension and is complete.
+        """
+        verdicts = {}
+        pending = []
+        for path in paths:
+            stat = os.stat(path)
+            key = f"{CHECK_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+            cached = self._cache.get(str(path))
+            if cached is not None and cached[0] == key:
+                verdicts[path] = cached[1]
+            else:
+                pending.append((path, key))
+
+        if pending:
+            for (path, key), verdict in zip(pending, self._executor.map(_check, (p for p, _ in pending))):
+                verdicts[path] = verdict
+                self._cache[str(path)] = [key, verdict]
+        return verdicts
+
+    def close(self):
+        """Stops the thread pool and writes the cache file."""
+        self._executor.shutdown()
+        if self.cache_file is not None:
+            with open(self.cache_file, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
@@ -0,0 +1,16 @@
+import pytest
+
+
+@pytest.fixture
+def minimal_config():
+    # adjust to match constructor requirements if needed
+    return {
+        "raw_image_folder": "raw",
+        "ignore_dirs": [],
+        "makros_setup": "",
+        "makro_file": "makro.md",
+        "image_folder": "img",
+        "how_to_use": "",
+        "repository": "https://github.com/user/repo",
+        "image_extensions": (".png", ".jpg", ".jpeg"),
+    }
@@ -0,0 +1,190 @@
+import struct
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+from liascript_img_makro_gen.archive import ArchiveIndex, is_archive
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+
+
+@pytest.fixture
+def image_tree(tmp_path):
+    """
+    Create a temporary folder structure with a license file:
+    tmp_path/
+      img/
+        category1/
+          LICENSE
+          subcategory/
+            five.png
+          one.png
+          Two.jpg
+        category2/
+          three.png
+          notes.txt
+    Returns the Path to the img directory.
+    """
+    img = tmp_path / "img"
+    sub = img / "category1" / "subcategory"
+    cat2 = img / "category2"
+    sub.mkdir(parents=True)
+    cat2.mkdir()
+    (img / "category1" / "LICENSE").write_text("CC-BY Example", encoding="utf-8")
+    (img / "category1" / "one.png").write_bytes(b"\x89PNG\r\n")
+    (img / "category1" / "Two.jpg").write_bytes(b"\xFF\xD8\xFF")
+    (sub / "five.png").write_bytes(b"\x89PNG\r\n")
+    (cat2 / "three.png").write_bytes(b"\x89PNG\r\n")
+    (cat2 / "notes.txt").write_text("not an image", encoding="utf-8")
+    return img
+
+
+def build(config):
+    gen = LiaScriptMakroGenerator(config)
+    gen.process_folders()
+    return gen.makro_file.build()
+
+
+@pytest.mark.parametrize("filename", ["images.tar", "images.tar.gz", "images.zip"])
+def test_archive_output_matches_extracted_tree(image_tree, monkeypatch, filename, minimal_config):
+    monkeypatch.chdir(image_tree.parent)
+    archive = image_tree.parent / filename
+    if filename.endswith(".zip"):
+        with zipfile.ZipFile(archive, "w") as zf:
+            for path in sorted(image_tree.rglob("*")):
+                zf.write(path, path.relative_to(image_tree).as_posix())
+    else:
+        with tarfile.open(archive, "w:gz" if filename.endswith(".gz") else "w") as tar:
+            tar.add(image_tree, arcname=".")
+
+    expected = build(minimal_config)
+    result = build(dict(minimal_config, image_archive=filename))
+
+    assert "@category1.license: Bildquellen: CC-BY Example" in result
+    assert result == expected, "Scanning the archive must produce the same output as the extracted tree"
+
+
+class LegacyZipInfo(zipfile.ZipInfo):
+    """Stores the name with the given raw bytes and without the UTF-8 flag, like Info-ZIP does."""
+
+    def __init__(self, filename, raw_name: bytes):
+        super().__init__(filename)
+        self.raw_name = raw_name
+
+    def _encodeFilenameFlags(self):
+        return self.raw_name, self.flag_bits
+
+
+def write_legacy_zip(archive, tree: Path, raw_name):
+    with zipfile.ZipFile(archive, "w") as zf:
+        for path in sorted(tree.rglob("*")):
+            name = path.relative_to(tree).as_posix() + ("/" if path.is_dir() else "")
+            info = LegacyZipInfo(name, raw_name(name))
+            info.external_attr = 0o40755 << 16 if path.is_dir() else 0o644 << 16
+            zf.writestr(info, b"" if path.is_dir() else path.read_bytes())
+
+
+def unicode_path_field(name: str, raw: bytes) -> bytes:
+    data = b"\x01" + struct.pack("<I", zipfile.crc32(raw)) + name.encode("utf-8")
+    return struct.pack("<HH", 0x7075, len(data)) + data
+
+
+@pytest.fixture
+def umlaut_tree(tmp_path):
+    img = tmp_path / "img"
+    (img / "Ä").mkdir(parents=True)
+    (img / "Ä" / "LICENSE").write_text("Bildquelle Müller", encoding="utf-8")
+    (img / "Ä" / "ö.png").write_bytes(b"\x89PNG\r\n")
+    (img / "Größe").mkdir()
+    (img / "Größe" / "Straße.png").write_bytes(b"\x89PNG\r\n")
+    return img
+
+
+def test_zip_without_utf8_flag_matches_extracted_tree(umlaut_tree, monkeypatch, minimal_config):
+    monkeypatch.chdir(umlaut_tree.parent)
+    write_legacy_zip("images.zip", umlaut_tree, lambda name: name.encode("utf-8"))
+
+    expected = build(minimal_config)
+    result = build(dict(minimal_config, image_archive="images.zip"))
+
+    assert "@Ä.oe" in expected
+    assert result == expected
+
+
+def test_zip_unicode_path_field_matches_extracted_tree(umlaut_tree, monkeypatch, minimal_config):
+    monkeypatch.chdir(umlaut_tree.parent)
+    with zipfile.ZipFile("images.zip", "w") as zf:
+        for path in sorted(umlaut_tree.rglob("*")):
+            if path.is_dir():
+                continue
+            name = path.relative_to(umlaut_tree).as_posix()
+            # Windows code page name, the UTF-8 name is only in the extra field
+            raw = name.encode("cp1252")
+            info = LegacyZipInfo(name, raw)
+            info.extra = unicode_path_field(name, raw)
+            zf.writestr(info, path.read_bytes())
+
+    assert build(dict(minimal_config, image_archive="images.zip")) == build(minimal_config)
+
+
+def test_archive_root_selects_subfolder(image_tree, monkeypatch, minimal_config):
+    monkeypatch.chdir(image_tree.parent)
+    with tarfile.open("images.tgz", "w:gz") as tar:
+        tar.add(image_tree, arcname="img")
+
+    expected = build(minimal_config)
+    result = build(dict(minimal_config, image_archive="images.tgz", image_archive_root="img"))
+
+    assert result == expected
+
+
+def test_archive_index_keeps_only_license_payload(image_tree, tmp_path):
+    archive = tmp_path / "images.tar"
+    with tarfile.open(archive, "w") as tar:
+        tar.add(image_tree, arcname=".")
+
+    root = ArchiveIndex(archive).root("img")
+
+    assert (root / "category1" / "LICENSE").read_text() == "CC-BY Example"
+    assert (root / "category1" / "one.png").is_file()
+    assert (root / "category1" / "subcategory").is_dir()
+    assert not (root / "missing").exists()
+    with pytest.raises(FileNotFoundError):
+        (root / "category1" / "one.png").read_bytes()
+
+
+def test_tar_ending_with_a_zip_member_is_read_as_tar(image_tree, tmp_path):
+    inner = tmp_path / "inner.zip"
+    with zipfile.ZipFile(inner, "w") as zf:
+        zf.writestr("inner/x.png", b"\x89PNG\r\n")
+    archive = tmp_path / "images.tar"
+    with tarfile.open(archive, "w") as tar:
+        tar.add(image_tree, arcname=".")
+        tar.add(inner, arcname="inner.zip")
+
+    root = ArchiveIndex(archive).root("img")
+
+    assert (root / "category1" / "one.png").is_file()
+    assert (root / "inner.zip").is_file()
+    assert not (root / "inner").exists()
+
+
+def test_archive_root_missing_folder_raises(image_tree, tmp_path):
+    archive = tmp_path / "images.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.write(image_tree / "category2" / "three.png", "category2/three.png")
+
+    with pytest.raises(ValueError, match="not found in archive"):
+        ArchiveIndex(archive).root("img", "img")
+
+
+@pytest.mark.parametrize("filename, expected", [
+    ("images.tar", True),
+    ("images.TAR.GZ", True),
+    ("images.tgz", True),
+    ("images.zip", True),
+    ("img", False),
+    ("images.gz", False),
+])
+def test_is_archive(filename, expected):
+    assert is_archive(Path(filename)) == expected
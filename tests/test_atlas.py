@@ -0,0 +1,78 @@
+import struct
+
+import pytest
+from liascript_img_makro_gen.atlas import SpriteAtlas, image_size, pack
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+
+
+def png(width, height, tag=b""):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", width, height) + tag
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 4) + b"\x00\x00"
+    sof = b"\xff\xc0" + struct.pack(">HBHH", 11, 8, height, width) + b"\x01\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof
+
+
+@pytest.mark.parametrize("data, expected", [
+    (png(16, 8), (16, 8)),
+    (b"GIF89a" + struct.pack("<HH", 5, 7), (5, 7)),
+    (jpeg(40, 30), (40, 30)),
+    (b"BM" + b"\x00" * 16 + struct.pack("<ii", 3, -4), (3, 4)),
+    (b"<html>", None),
+])
+def test_image_size(data, expected):
+    assert image_size(data) == expected
+
+
+def test_pack_does_not_overlap():
+    sizes = {f"i{n}": (8 + n % 5, 4 + n % 3) for n in range(30)}
+    positions, width, height = pack(sizes)
+
+    boxes = [(x, y, x + sizes[k][0], y + sizes[k][1]) for k, (x, y) in positions.items()]
+    for index, a in enumerate(boxes):
+        assert a[2] <= width and a[3] <= height
+        for b in boxes[index + 1:]:
+            assert a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1], "regions overlap"
+
+
+def test_atlas_is_only_rebuilt_on_content_change(tmp_path):
+    (tmp_path / "a.png").write_bytes(png(10, 10))
+    (tmp_path / "b.png").write_bytes(png(20, 10))
+    images = {"a.png": tmp_path / "a.png", "b.png": tmp_path / "b.png"}
+
+    assert SpriteAtlas(tmp_path / "atlas" / "cat.svg").build(images)
+    atlas = SpriteAtlas(tmp_path / "atlas" / "cat.svg")
+    assert not atlas.build(images), "unchanged members must not rebuild the atlas"
+    assert atlas.regions["b.png"] == (0, 0, 20, 10)
+
+    (tmp_path / "a.png").write_bytes(png(10, 10, b"changed"))
+    assert SpriteAtlas(tmp_path / "atlas" / "cat.svg").build(images)
+
+
+def test_css_background_scales_with_element():
+    atlas = SpriteAtlas("unused.svg")
+    atlas.width, atlas.height = 30, 10
+    atlas.regions = {"a": (0, 0, 10, 10), "b": (20, 0, 10, 10)}
+
+    assert atlas.css_background("a") == "0% 0% / 300% 100% no-repeat"
+    assert atlas.css_background("b") == "100% 0% / 300% 100% no-repeat"
+
+
+def test_generator_uses_atlas_for_selected_categories(tmp_path, monkeypatch, minimal_config):
+    for category in ("Icons", "Fotos"):
+        (tmp_path / "img" / category).mkdir(parents=True)
+        (tmp_path / "img" / category / "bild.png").write_bytes(png(4, 4))
+    monkeypatch.chdir(tmp_path)
+
+    gen = LiaScriptMakroGenerator(dict(minimal_config, atlas_categories=["Icons"],
+                                       raw_image_folder="https://raw.githubusercontent.com/user/repo/refs/heads/main/img"))
+    gen.process_folders()
+    header = "\n".join(gen.makro_file._header)
+
+    assert (tmp_path / "atlas" / "Icons.svg").is_file()
+    assert not (tmp_path / "atlas" / "Fotos.svg").exists()
+    assert "url('https://raw.githubusercontent.com/user/repo/refs/heads/main/atlas/Icons.svg')" in header
+    assert "@Fotos.bild: @diagnostik_image(" in header
+    assert "@Icons.bild.src: https://raw.githubusercontent.com/user/repo/refs/heads/main/img/Icons/bild.png" in header
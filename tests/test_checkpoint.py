@@ -0,0 +1,112 @@
+import pytest
+from liascript_img_makro_gen.checkpoint import Checkpoint, Progress
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+from liascript_img_makro_gen.tools import DocumentBuilder
+
+
+@pytest.fixture
+def image_tree(tmp_path, monkeypatch):
+    """
+    tmp_path/img/
+      a/one.png
+      a/sub/two.png
+      b/three.png
+      c/four.png
+    """
+    for path in ("a/one.png", "a/sub/two.png", "b/three.png", "c/four.png"):
+        (tmp_path / "img" / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / "img" / path).write_bytes(b"\x89PNG\r\n")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "img"
+
+
+@pytest.fixture
+def checkpoint_config(minimal_config):
+    return dict(minimal_config, checkpoint_file="state.json")
+
+
+def test_resume_skips_finished_folders(image_tree, monkeypatch, checkpoint_config):
+    expected = LiaScriptMakroGenerator(dict(checkpoint_config, checkpoint_file=""))
+    expected.build_document()
+
+    # interrupt the first run while processing folder c
+    original_process_file = LiaScriptMakroGenerator.process_file
+
+    def interrupted(self, filepath):
+        if filepath.parts[0] == "c":
+            raise KeyboardInterrupt
+        original_process_file(self, filepath)
+
+    monkeypatch.setattr(LiaScriptMakroGenerator, "process_file", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        LiaScriptMakroGenerator(checkpoint_config).build_document()
+    assert (image_tree.parent / "state.json").is_file()
+    monkeypatch.undo()
+    monkeypatch.chdir(image_tree.parent)
+
+    walked = []
+    original_process_folder = LiaScriptMakroGenerator.process_folder
+
+    def recording(self, target):
+        walked.append(target.name)
+        original_process_folder(self, target)
+
+    monkeypatch.setattr(LiaScriptMakroGenerator, "process_folder", recording)
+    resumed = LiaScriptMakroGenerator(dict(checkpoint_config, resume=True))
+    resumed.build_document()
+
+    assert walked == ["img", "c"], "finished folders must not be walked again"
+    assert resumed.makro_file.build() == expected.makro_file.build()
+    assert resumed.catalog == expected.catalog
+    assert resumed.makro_file.sections() == expected.makro_file.sections()
+    assert not (image_tree.parent / "state.json").exists(), "a finished run removes its checkpoint"
+
+
+@pytest.mark.parametrize("symlinks", ["alias", "skip"])
+def test_linked_folders_count_as_finished(image_tree, symlinks, checkpoint_config):
+    (image_tree / "d").symlink_to(image_tree / "b", target_is_directory=True)
+    (image_tree / "b" / "back").symlink_to(image_tree, target_is_directory=True)
+    gen = LiaScriptMakroGenerator(dict(checkpoint_config, symlinks=symlinks))
+    gen.build_document()
+
+    assert gen._progress.top_done == gen._progress.top_total == 4
+    if symlinks == "alias":
+        # the reference to the aliased folder is checkpointed like any other output
+        alias = gen._checkpoint.completed["d"]["document"]["body"]
+        assert any("[b](#b)" in line for line in alias)
+
+
+def test_folder_output_is_only_copied_for_a_checkpoint(image_tree, monkeypatch, minimal_config):
+    monkeypatch.setattr(DocumentBuilder, "since", lambda self, mark: pytest.fail("folder output was copied"))
+    gen = LiaScriptMakroGenerator(minimal_config)
+    gen.build_document()
+
+    assert gen._progress.top_done == 3
+
+
+def test_checkpoint_of_other_config_is_ignored(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "state.json", "one")
+    checkpoint.complete("a", DocumentBuilder(), [])
+    checkpoint.save()
+
+    assert set(Checkpoint(tmp_path / "state.json", "one").load()) == {"a"}
+    assert Checkpoint(tmp_path / "state.json", "two").load() == {}
+
+
+def test_finished_folder_replaces_its_subfolders(tmp_path):
+    checkpoint = Checkpoint(tmp_path / "state.json", "one")
+    checkpoint.complete("a/sub", DocumentBuilder(), [])
+    checkpoint.complete("ab", DocumentBuilder(), [])
+    checkpoint.complete("a", DocumentBuilder(), [])
+
+    assert set(checkpoint.completed) == {"a", "ab"}
+
+
+def test_progress_report():
+    progress = Progress()
+    progress.top_total, progress.top_done, progress.files = 4, 1, 10
+
+    report = progress.report()
+
+    assert report.startswith("10 images, 1/4 folders, ")
+    assert "images/s, ETA " in report
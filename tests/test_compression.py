@@ -0,0 +1,81 @@
+import gzip
+
+import pytest
+from liascript_img_makro_gen.compression import CompressedOutputs, check_encodings, size_regressions
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+
+
+def test_gzip_siblings_are_deterministic(tmp_path):
+    output = tmp_path / "makros.md"
+    output.write_text("@a.b: c\n" * 100, encoding="utf-8")
+
+    first = CompressedOutputs(["gzip"])
+    first.submit(output, "makros.md")
+    sizes = first.close()
+    content = (tmp_path / "makros.md.gz").read_bytes()
+
+    second = CompressedOutputs(["gzip"])
+    second.submit(output, "makros.md")
+    second.close()
+
+    assert gzip.decompress(content) == output.read_bytes()
+    assert (tmp_path / "makros.md.gz").read_bytes() == content
+    assert sizes == {"makros.md": {"gzip": len(content)}}
+
+
+def test_brotli_siblings(tmp_path):
+    brotli = pytest.importorskip("brotli")
+    output = tmp_path / "makros.md"
+    output.write_text("@a.b: c\n" * 100, encoding="utf-8")
+
+    compressor = CompressedOutputs(["br"])
+    compressor.submit(output, "makros.md")
+    compressor.close()
+
+    assert brotli.decompress((tmp_path / "makros.md.br").read_bytes()) == output.read_bytes()
+
+
+def test_unknown_encoding_raises():
+    with pytest.raises(ValueError, match="Unknown compression"):
+        check_encodings(["zstd"])
+
+
+def test_size_regressions():
+    baseline = {"makros.md": {"gzip": 1000}, "search.json": {"gzip": 100}}
+    sizes = {"makros.md": {"gzip": 1101}, "search.json": {"gzip": 110}, "new.md": {"gzip": 5}}
+
+    assert size_regressions(sizes, baseline, 0.1) == ["makros.md (gzip) grew from 1000 to 1101 bytes"]
+
+
+def test_generator_compresses_and_checks_baseline(tmp_path, monkeypatch, minimal_config):
+    (tmp_path / "img" / "cat").mkdir(parents=True)
+    (tmp_path / "img" / "cat" / "one.png").write_bytes(b"\x89PNG\r\n")
+    monkeypatch.chdir(tmp_path)
+    config = dict(minimal_config, search_index_file="search.json", compress_outputs=["gzip"],
+                  size_baseline_file="sizes.json")
+
+    first = LiaScriptMakroGenerator(config)
+    first.generate_makros()
+    assert set(first.compressed_sizes) == {"makro.md", "search.json"}
+    assert (tmp_path / "makro.md.gz").is_file() and (tmp_path / "search.json.gz").is_file()
+    assert (tmp_path / "sizes.json").is_file(), "the first run records the baseline"
+
+    for number in range(200):
+        (tmp_path / "img" / "cat" / f"bild_{number}.png").write_bytes(b"\x89PNG\r\n")
+    second = LiaScriptMakroGenerator(config)
+    second.generate_makros()
+
+    assert any(message.startswith("makro.md (gzip) grew") for message in second.size_regressions)
+
+
+def test_generator_stops_compression_thread_on_error(tmp_path, monkeypatch, minimal_config):
+    monkeypatch.chdir(tmp_path)
+    closed = []
+    monkeypatch.setattr(CompressedOutputs, "close", lambda self: closed.append(self) or {})
+    generator = LiaScriptMakroGenerator(dict(minimal_config, image_folder="missing", compress_outputs=["gzip"]))
+
+    with pytest.raises(FileNotFoundError):
+        generator.generate_makros()
+
+    assert len(closed) == 1
+    assert generator._compressor is None
@@ -155,3 +155,40 @@ def test_image_extensions_start_with_dot():
     }
     updated = ensure_validity(config_data)
     assert updated["image_extensions"] == [".jpg", ".png", ".jpeg"], "Image extensions should start with a dot."
+
+def test_image_archive_must_be_archive():
+    config_data = {
+        "repository": "https://github.com/user/reponame",
+        "image_folder": "img",
+        "makro_file": "makro.md",
+        "image_archive": "images.rar",
+        "image_extensions": []
+    }
+    with pytest.raises(ValueError, match="image_archive"):
+        ensure_validity(config_data)
+
+
+def test_file_pins_are_rejected_with_image_archive():
+    config_data = {
+        "repository": "https://github.com/user/reponame",
+        "image_folder": "img",
+        "makro_file": "makro.md",
+        "image_archive": "images.tar",
+        "pin_urls": "file",
+        "image_extensions": []
+    }
+    with pytest.raises(ValueError, match="pin_urls"):
+        ensure_validity(config_data)
+
+
+def test_sources_are_rejected_with_image_archive():
+    config_data = {
+        "repository": "https://github.com/user/reponame",
+        "image_folder": "img",
+        "makro_file": "makro.md",
+        "image_archive": "images.tar",
+        "sources": [{"image_folder": "img"}],
+        "image_extensions": []
+    }
+    with pytest.raises(ValueError, match="sources"):
+        ensure_validity(config_data)
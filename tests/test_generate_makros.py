@@ -78,7 +78,7 @@ def test_constructor_sets_config_values():
 
 def test_generate_makros(monkeypatch):
     # Arrange: predictable location and no-op heavy methods on the generator class
-    monkeypatch.setattr(ConfigLoader, "generate_raw_location", lambda repo, makro_file: "dummy_location")
+    monkeypatch.setattr(ConfigLoader, "generate_raw_location", lambda repo, makro_file, ref="refs/heads/main": "dummy_location")
     monkeypatch.setattr(
         LiaScriptMakroGenerator,
         "process_folders",
@@ -289,21 +289,6 @@ def test_recursive_images_for_order(image_tree, monkeypatch):
 
     assert output_part in body, "image order is not correct"
 
-@pytest.fixture
-def minimal_config():
-    # adjust to match constructor requirements if needed
-    return {
-        "raw_image_folder": "raw",
-        "ignore_dirs": [],
-        "makros_setup": "",
-        "makro_file": "makro.md",
-        "image_folder": "img",
-        "how_to_use": "",
-        "repository": "",
-        "image_extensions": (".png", ".jpg", ".jpeg"),
-    }
-
-
 def write_license_file(root: Path, name: str, content: str) -> Path:
     p = root / name
     p.write_text(content, encoding="utf-8")
@@ -405,3 +390,98 @@ def test_process_license_file_two_levels_deep_macro_name(tmp_path, minimal_confi
     assert "@painter_tools.license" in header_text, (
         "Expected macro '@painter_tools.license' to be present in header for a LICENSE file at img/painter/tools/LICENSE"
     )
+
+@pytest.fixture
+def linked_tree(tmp_path):
+    """
+    tmp_path/
+      img/
+        a_shared/
+          icon.png
+          loop -> img/a_shared
+        b_link -> img/a_shared
+    """
+    img = tmp_path / "img"
+    shared = img / "a_shared"
+    shared.mkdir(parents=True)
+    (shared / "icon.png").write_bytes(b"\x89PNG\r\n")
+    (shared / "loop").symlink_to(shared, target_is_directory=True)
+    (img / "b_link").symlink_to(shared, target_is_directory=True)
+    return img
+
+
+@pytest.mark.parametrize("policy, expected_icons, expected_headings", [
+    ("follow", 2, ["### a_shared", "### b_link"]),
+    ("skip", 1, ["### a_shared"]),
+    ("alias", 1, ["### a_shared", "### b_link"]),
+])
+def test_symlink_policies_cut_cycles(linked_tree, monkeypatch, minimal_config, policy, expected_icons, expected_headings):
+    monkeypatch.chdir(linked_tree.parent)
+    gen = LiaScriptMakroGenerator(dict(minimal_config, symlinks=policy))
+
+    gen.process_folders()
+
+    body = "\n".join(gen.makro_file._body)
+    headings = [line.strip() for line in body.splitlines() if line.startswith("###")]
+    assert headings == expected_headings
+    assert len(gen.catalog) == expected_icons
+    assert "loop" not in body, "a link back to a parent folder must not be scanned"
+
+
+def test_symlink_alias_refers_to_first_scan(linked_tree, monkeypatch, minimal_config):
+    monkeypatch.chdir(linked_tree.parent)
+    gen = LiaScriptMakroGenerator(dict(minimal_config, symlinks="alias"))
+
+    gen.process_folders()
+
+    assert gen.makro_file.build_section("b_link").endswith(
+        "Dieser Ordner verweist auf [a_shared](#a_shared), die Bilder sind dort mit `@a_shared.<Name>` verfügbar."
+    )
+
+def test_symlink_alias_names_the_makros_of_deep_folders(tmp_path, monkeypatch, minimal_config):
+    (tmp_path / "img" / "A" / "B" / "C").mkdir(parents=True)
+    (tmp_path / "img" / "A" / "B" / "C" / "x.png").write_bytes(b"\x89PNG\r\n")
+    (tmp_path / "img" / "Z").mkdir()
+    (tmp_path / "img" / "Z" / "link").symlink_to(tmp_path / "img" / "A" / "B" / "C", target_is_directory=True)
+    monkeypatch.chdir(tmp_path)
+    gen = LiaScriptMakroGenerator(dict(minimal_config, symlinks="alias"))
+
+    gen.process_folders()
+
+    assert "@A_B_C.x" in gen.makro_file.makro_names()
+    assert gen.makro_file.build_section("Z_link").endswith(
+        "Dieser Ordner verweist auf [B_C](#B_C), die Bilder sind dort mit `@A_B_C.<Name>` verfügbar."
+    )
+
+
+def test_nested_image_folder(tmp_path, monkeypatch, minimal_config):
+    (tmp_path / "assets" / "img" / "category").mkdir(parents=True)
+    (tmp_path / "assets" / "img" / "category" / "one.png").write_bytes(b"\x89PNG\r\n")
+    monkeypatch.chdir(tmp_path)
+
+    gen = LiaScriptMakroGenerator(dict(minimal_config, image_folder="assets/img"))
+    gen.process_folders()
+
+    assert "\n### category\n" in gen.makro_file._body
+    assert gen.catalog[0]["category"] == "category"
+
+def test_documentation_file_splits_header_and_body(image_tree, monkeypatch, minimal_config):
+    monkeypatch.chdir(image_tree.parent)
+    config = dict(minimal_config, ignore_dirs=["ignore_folder"], makros_setup="<!--\ntitle: Makros",
+                  makro_file="makros.md", documentation_file="dokumentation.md",
+                  how_to_use="[course](https://liascript.github.io/course/?{doc_location}) import {raw_location}")
+
+    LiaScriptMakroGenerator(config).generate_makros()
+
+    makros = (image_tree.parent / "makros.md").read_text(encoding="utf-8")
+    documentation = (image_tree.parent / "dokumentation.md").read_text(encoding="utf-8")
+    raw = "https://raw.githubusercontent.com/user/repo/refs/heads/main"
+
+    assert makros.startswith("<!--\ntitle: Makros\n")
+    assert makros.endswith("-->\n")
+    assert "@category1.one.src:" in makros
+    assert "|Bild|Name|Befehl|" not in makros
+    assert documentation.startswith(f"<!--\nimport: {raw}/makros.md\n-->\n")
+    assert f"[course](https://liascript.github.io/course/?{raw}/dokumentation.md) import {raw}/makros.md" in documentation
+    assert "|@category1.one(10)|_one_|`@category1.one(10)`|" in documentation
+    assert "@category1.one.src:" not in documentation
@@ -0,0 +1,105 @@
+import shutil
+import subprocess
+
+import pytest
+import yaml
+from liascript_img_makro_gen.confighandler import ConfigLoader
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+from liascript_img_makro_gen.gitinfo import find_git_dir, head_commit, last_commits, resolve_ref
+
+SHA_A = "a" * 40
+SHA_B = "b" * 40
+
+
+@pytest.fixture
+def git_dir(tmp_path):
+    """A minimal hand written git directory without any objects."""
+    git = tmp_path / ".git"
+    (git / "refs" / "heads").mkdir(parents=True)
+    (git / "HEAD").write_text("ref: refs/heads/main\n", encoding="utf-8")
+    return git
+
+
+def test_resolve_loose_branch(git_dir):
+    (git_dir / "refs" / "heads" / "main").write_text(SHA_A + "\n", encoding="utf-8")
+    assert head_commit(git_dir.parent / "sub" / "dir") == SHA_A
+
+
+def test_resolve_packed_ref(git_dir):
+    (git_dir / "packed-refs").write_text(
+        f"# pack-refs with: peeled fully-peeled sorted\n{SHA_B} refs/heads/main\n^{SHA_A}\n", encoding="utf-8"
+    )
+    assert resolve_ref(git_dir) == SHA_B
+
+
+def test_resolve_detached_head(git_dir):
+    (git_dir / "HEAD").write_text(SHA_B + "\n", encoding="utf-8")
+    assert resolve_ref(git_dir) == SHA_B
+
+
+def test_gitdir_file_is_followed(tmp_path, git_dir):
+    worktree = tmp_path / "worktree"
+    worktree.mkdir()
+    (worktree / ".git").write_text(f"gitdir: {git_dir}\n", encoding="utf-8")
+    assert find_git_dir(worktree) == git_dir.resolve()
+
+
+def test_unresolvable_ref_raises(git_dir):
+    with pytest.raises(ValueError, match="Could not resolve"):
+        resolve_ref(git_dir)
+
+
+def test_commit_pinned_raw_image_folder(tmp_path, git_dir, monkeypatch):
+    (git_dir / "refs" / "heads" / "main").write_text(SHA_A + "\n", encoding="utf-8")
+    config_file = tmp_path / "config.yaml"
+    with open(config_file, "w", encoding="utf-8") as f:
+        yaml.dump({"repository": "https://github.com/user/repo", "pin_urls": "commit", "branch": "dev"}, f)
+    monkeypatch.chdir(tmp_path)
+
+    config = ConfigLoader(str(config_file)).load_config()
+
+    assert config["raw_image_folder"] == f"https://raw.githubusercontent.com/user/repo/{SHA_A}/img"
+
+
+def test_branch_is_configurable(tmp_path):
+    config_file = tmp_path / "config.yaml"
+    with open(config_file, "w", encoding="utf-8") as f:
+        yaml.dump({"repository": "https://github.com/user/repo", "branch": "dev"}, f)
+
+    config = ConfigLoader(str(config_file)).load_config()
+
+    assert config["raw_image_folder"] == "https://raw.githubusercontent.com/user/repo/refs/heads/dev/img"
+
+
+def git(cwd, *args):
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=cwd, check=True, capture_output=True, text=True,
+    ).stdout.strip()
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+def test_file_pinned_urls_use_last_touching_commit(tmp_path, monkeypatch, minimal_config):
+    (tmp_path / "img" / "cat").mkdir(parents=True)
+    git(tmp_path, "init", "-q")
+    (tmp_path / "img" / "cat" / "alt.png").write_bytes(b"\x89PNG\r\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "first")
+    first = git(tmp_path, "rev-parse", "HEAD")
+    (tmp_path / "img" / "cat" / "neu.png").write_bytes(b"\x89PNG\r\n")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "second")
+    second = git(tmp_path, "rev-parse", "HEAD")
+    (tmp_path / "img" / "cat" / "untracked.png").write_bytes(b"\x89PNG\r\n")
+    monkeypatch.chdir(tmp_path)
+
+    assert last_commits("img", tmp_path) == {"img/cat/alt.png": first, "img/cat/neu.png": second}
+
+    gen = LiaScriptMakroGenerator(dict(minimal_config, pin_urls="file",
+                                       raw_image_folder="https://raw.githubusercontent.com/user/repo/refs/heads/main/img"))
+    gen.process_folders()
+    header = "\n".join(gen.makro_file._header)
+
+    assert f"@cat.alt.src: https://raw.githubusercontent.com/user/repo/{first}/img/cat/alt.png" in header
+    assert f"@cat.neu.src: https://raw.githubusercontent.com/user/repo/{second}/img/cat/neu.png" in header
+    assert "@cat.untracked.src: https://raw.githubusercontent.com/user/repo/refs/heads/main/img/cat/untracked.png" in header
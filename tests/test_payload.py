@@ -0,0 +1,45 @@
+import json
+
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+from liascript_img_makro_gen.payload import is_over_budget, payload_report
+
+
+CATALOG = [
+    {"category": "Fotos", "name": "gross", "size": 12_000_000},
+    {"category": "Fotos", "name": "klein", "size": 200_000},
+    {"category": "Icons", "name": "pfeil", "size": 2_000},
+    {"category": "Icons", "name": "haken", "size": 3_000},
+]
+
+
+def test_report_sums_and_sorts_categories():
+    report = payload_report(CATALOG)
+
+    assert report["total_bytes"] == 12_205_000
+    assert [c["category"] for c in report["categories"]] == ["Fotos", "Icons"]
+    assert report["categories"][1] == {"category": "Icons", "bytes": 5_000, "images": 2, "over_budget": False}
+    assert not is_over_budget(report), "without budgets nothing is over budget"
+
+
+def test_report_flags_budgets():
+    report = payload_report(CATALOG, image_budget=1_000_000, category_budget=4_000, course_budget=20_000_000)
+
+    assert report["images_over_budget"] == [{"macro": "@Fotos.gross", "bytes": 12_000_000}]
+    assert [c["over_budget"] for c in report["categories"]] == [True, True]
+    assert not report["over_budget"]
+    assert is_over_budget(report)
+
+
+def test_generator_collects_sizes_and_writes_report(tmp_path, monkeypatch, minimal_config):
+    (tmp_path / "img" / "Fotos").mkdir(parents=True)
+    (tmp_path / "img" / "Fotos" / "gross.png").write_bytes(b"x" * 300)
+    (tmp_path / "img" / "Fotos" / "klein.png").write_bytes(b"x" * 20)
+    monkeypatch.chdir(tmp_path)
+
+    gen = LiaScriptMakroGenerator(dict(minimal_config, payload_report_file="payload.json", budget_image_bytes=100))
+    gen.generate_makros()
+
+    report = json.loads((tmp_path / "payload.json").read_text(encoding="utf-8"))
+    assert report["total_bytes"] == 320
+    assert report["images_over_budget"] == [{"macro": "@Fotos.gross", "bytes": 300}]
+    assert is_over_budget(gen.payload)
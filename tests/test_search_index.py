@@ -0,0 +1,54 @@
+import json
+
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+from liascript_img_makro_gen.search_index import SEARCH_SNIPPET, build_search_index, image_tokens, search
+
+
+CATALOG = [
+    {"category": "Maler_Werkzeuge", "name": "Bürste_breit", "file": "Maler/Werkzeuge/Bürste_breit.png", "title": "Bürste breit"},
+    {"category": "Maler_Werkzeuge", "name": "Rolle", "file": "Maler/Werkzeuge/Rolle.png", "title": "Rolle"},
+    {"category": "Tischler", "name": "Bohrer_klein", "file": "Tischler/Bohrer-klein.jpg", "title": "Bohrer klein"},
+]
+
+
+def test_image_tokens_include_name_umlaut_variant_and_categories():
+    tokens = image_tokens(CATALOG[0])
+    assert {"bürste", "buerste", "breit", "maler", "werkzeuge"} <= tokens
+
+
+def test_search_prefix_and_intersection():
+    index = build_search_index(CATALOG)
+
+    assert search(index, "bü") == [["@Maler_Werkzeuge.Bürste_breit", "Bürste breit"]]
+    assert search(index, "buer") == [["@Maler_Werkzeuge.Bürste_breit", "Bürste breit"]]
+    assert [e[0] for e in search(index, "maler")] == ["@Maler_Werkzeuge.Bürste_breit", "@Maler_Werkzeuge.Rolle"]
+    assert search(index, "maler rol") == [["@Maler_Werkzeuge.Rolle", "Rolle"]]
+    assert search(index, "maler bohr") == []
+    assert search(index, "") == []
+
+
+def test_index_tokens_are_sorted():
+    index = build_search_index(CATALOG)
+    assert index["tokens"] == sorted(index["tokens"])
+    assert len(index["tokens"]) == len(index["postings"])
+
+
+def test_generate_makros_writes_index_and_snippet(tmp_path, monkeypatch, minimal_config):
+    (tmp_path / "img" / "category").mkdir(parents=True)
+    (tmp_path / "img" / "category" / "test-one.png").write_bytes(b"\x89PNG\r\n")
+    monkeypatch.chdir(tmp_path)
+    config = dict(minimal_config, search_index_file="search.json",
+                  raw_image_folder="https://raw.githubusercontent.com/user/repo/refs/heads/main/img")
+
+    LiaScriptMakroGenerator(config).generate_makros()
+
+    index = json.loads((tmp_path / "search.json").read_text(encoding="utf-8"))
+    assert search(index, "test") == [["@category.test_one", "test one"]]
+    makros = (tmp_path / "makro.md").read_text(encoding="utf-8")
+    assert "https://raw.githubusercontent.com/user/repo/refs/heads/main/search.json" in makros
+
+
+def test_snippet_inserts_titles_as_text():
+    snippet = SEARCH_SNIPPET.format(index_url="search.json")
+    assert "innerHTML" not in snippet
+    assert "code.textContent" in snippet
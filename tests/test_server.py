@@ -0,0 +1,183 @@
+import gzip
+import http.client
+import threading
+
+import pytest
+import yaml
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+from liascript_img_makro_gen.server import MakroService, accepts_encoding, create_server
+
+
+@pytest.fixture
+def service_dir(tmp_path, monkeypatch):
+    """
+    tmp_path/
+      config.yaml
+      img/
+        Maler/
+          LICENSE
+          pinsel.png
+        Tischler/
+          hobel.png
+    """
+    for category, image in (("Maler", "pinsel.png"), ("Tischler", "hobel.png")):
+        (tmp_path / "img" / category).mkdir(parents=True)
+        (tmp_path / "img" / category / image).write_bytes(b"\x89PNG\r\n")
+    (tmp_path / "img" / "Maler" / "LICENSE").write_text("CC0", encoding="utf-8")
+    with open(tmp_path / "config.yaml", "w", encoding="utf-8") as f:
+        yaml.dump({"repository": "https://github.com/user/repo",
+                   "makros_setup": "<!--\n@diagnostik_image: <img src=\"@0/@1\">"}, f)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def client(service_dir):
+    service = MakroService(str(service_dir / "config.yaml"), refresh_interval=0)
+    server = create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def request(path, headers=None):
+        connection = http.client.HTTPConnection(*server.server_address)
+        connection.request("GET", path, headers=headers or {})
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        return response, body
+
+    yield request
+    server.shutdown()
+    server.server_close()
+
+
+def test_serves_full_makro_file(client):
+    response, body = client("/makros.md")
+    assert response.status == 200
+    assert "@Maler.pinsel.src: https://raw.githubusercontent.com/user/repo/refs/heads/main/img/Maler/pinsel.png" in body.decode()
+    assert response.getheader("ETag").startswith('"')
+
+
+def test_serves_category_fragment_and_index(client):
+    response, body = client("/categories/Tischler.md")
+    text = body.decode()
+    assert response.status == 200
+    assert "@Tischler.hobel.src" in text
+    assert "Maler" not in text
+    # the fragment defines the makros its image makros call
+    assert text.startswith('<!--\nrepository: "https://github.com/user/repo"\n@diagnostik_image:')
+
+    response, body = client("/index.json")
+    assert response.status == 200
+    assert b'"macro":"@Maler.pinsel"' in body
+
+
+def test_unknown_path_is_not_found(client):
+    response, _ = client("/nothing")
+    assert response.status == 404
+
+
+def test_conditional_get_and_gzip(client):
+    response, body = client("/makros.md")
+    etag = response.getheader("ETag")
+
+    response, body = client("/makros.md", {"If-None-Match": etag})
+    assert response.status == 304
+    assert body == b""
+
+    response, zipped = client("/makros.md", {"Accept-Encoding": "gzip"})
+    assert response.getheader("Content-Encoding") == "gzip"
+    assert response.getheader("ETag") != etag
+    assert b"@Maler.pinsel" in gzip.decompress(zipped)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", True),
+    ("deflate, gzip;q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, *", False),
+    ("*;q=0.1", True),
+    ("identity", False),
+    ("", False),
+])
+def test_accepts_encoding(header, expected):
+    assert accepts_encoding(header, "gzip") == expected
+
+
+def test_gzip_refused_with_zero_quality(client):
+    response, body = client("/makros.md", {"Accept-Encoding": "gzip;q=0"})
+    assert response.getheader("Content-Encoding") is None
+    assert b"@Maler.pinsel" in body
+
+
+def test_refresh_only_regenerates_on_change(service_dir):
+    service = MakroService(str(service_dir / "config.yaml"), refresh_interval=0)
+    assert service.refresh()
+    etag = service.get("/makros.md").etag
+    assert not service.refresh()
+
+    (service_dir / "img" / "Tischler" / "saege.png").write_bytes(b"\x89PNG\r\n")
+
+    assert service.refresh()
+    assert service.get("/makros.md").etag != etag
+    assert b"@Tischler.saege" in service.get("/makros.md").content
+
+
+def test_failed_render_is_retried(service_dir, monkeypatch):
+    service = MakroService(str(service_dir / "config.yaml"), refresh_interval=0)
+    assert service.refresh()
+    (service_dir / "img" / "Tischler" / "saege.png").write_bytes(b"\x89PNG\r\n")
+
+    original_render = MakroService._render
+    monkeypatch.setattr(MakroService, "_render", lambda self, unchanged: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        service.refresh()
+    # the previous output is served while the render fails
+    assert b"@Tischler.saege" not in service.get("/makros.md").content
+    monkeypatch.setattr(MakroService, "_render", original_render)
+
+    assert b"@Tischler.saege" in service.get("/makros.md").content
+
+
+def test_broken_config_keeps_previous_output(client, service_dir):
+    (service_dir / "config.yaml").write_text("repository: [", encoding="utf-8")
+
+    response, body = client("/makros.md")
+    assert response.status == 200
+    assert b"@Maler.pinsel" in body
+
+
+def test_errors_are_answered_with_500(client, monkeypatch):
+    def broken(self, path):
+        raise SystemExit(1)
+    monkeypatch.setattr(MakroService, "get", broken)
+
+    response, _ = client("/makros.md")
+    assert response.status == 500
+
+
+def test_refresh_only_rescans_changed_folders(service_dir, monkeypatch):
+    service = MakroService(str(service_dir / "config.yaml"), refresh_interval=0)
+    assert service.refresh()
+    first = service.get("/makros.md").content
+
+    scanned = []
+    original_process_folder = LiaScriptMakroGenerator.process_folder
+
+    def recording(self, target):
+        scanned.append(target.name)
+        original_process_folder(self, target)
+
+    monkeypatch.setattr(LiaScriptMakroGenerator, "process_folder", recording)
+    (service_dir / "img" / "Tischler" / "saege.png").write_bytes(b"\x89PNG\r\n")
+    assert service.refresh()
+
+    assert scanned == ["img", "Tischler"]
+    monkeypatch.undo()
+    monkeypatch.chdir(service_dir)
+    content = service.get("/makros.md").content
+    assert b"@Tischler.saege" in content and content != first
+    # the reused folder keeps its output, the result equals a complete scan
+    fresh = MakroService(str(service_dir / "config.yaml"))
+    fresh.refresh()
+    assert content == fresh.get("/makros.md").content
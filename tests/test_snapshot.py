@@ -0,0 +1,127 @@
+import struct
+import sys
+
+import pytest
+import yaml
+from liascript_img_makro_gen import main
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+from liascript_img_makro_gen.snapshot import diff_snapshots, has_changes, load_snapshot, save_snapshot
+
+
+def test_diff_classifies_changes():
+    old = {
+        "@a.one": "raw/a/one.png",
+        "@a.two": "raw/a/two.png",
+        "@a.three": "raw/a/three.png",
+        "@a.four": "raw/a/four.png",
+    }
+    new = {
+        "@a.one": "raw/a/one.png",
+        "@a.zwei": "raw/a/two.png",
+        "@a.three": "raw/b/three.png",
+        "@a.five": "raw/a/five.png",
+    }
+
+    report = diff_snapshots(old, new)
+
+    assert report == {
+        "added": ["@a.five"],
+        "removed": ["@a.four"],
+        "renamed": [{"from": "@a.two", "to": "@a.zwei", "value": "raw/a/two.png"}],
+        "changed": [{"macro": "@a.three", "from": "raw/a/three.png", "to": "raw/b/three.png"}],
+    }
+    assert has_changes(report)
+
+
+def test_identical_snapshots_have_no_changes():
+    snapshot = {"@a.one": "raw/a/one.png"}
+    assert not has_changes(diff_snapshots(snapshot, dict(snapshot)))
+
+
+def test_version_1_snapshot_is_still_read(tmp_path):
+    path = tmp_path / "snapshot.json"
+    path.write_text('{"version": 1, "macros": {"@a.one": "raw/a/one.png"}}', encoding="utf-8")
+    assert load_snapshot(path) == {"@a.one": "raw/a/one.png"}
+
+
+def test_snapshot_roundtrip_and_missing_file(tmp_path):
+    path = tmp_path / "snapshot.json"
+    assert load_snapshot(path) == {}
+
+    save_snapshot({"@ä.b": "raw/ä/b.png"}, path)
+    assert load_snapshot(path) == {"@ä.b": "raw/ä/b.png"}
+
+    path.write_text('{"version": 99, "macros": {}}', encoding="utf-8")
+    with pytest.raises(ValueError, match="Unsupported snapshot version"):
+        load_snapshot(path)
+
+
+def test_generate_makros_writes_snapshot(tmp_path, monkeypatch, minimal_config):
+    (tmp_path / "img" / "cat").mkdir(parents=True)
+    (tmp_path / "img" / "cat" / "one.png").write_bytes(b"\x89PNG\r\n")
+    monkeypatch.chdir(tmp_path)
+
+    LiaScriptMakroGenerator(dict(minimal_config, snapshot_file="snapshot.json")).generate_makros()
+
+    assert load_snapshot(tmp_path / "snapshot.json") == {
+        "@cat.one.src": "raw/cat/one.png",
+        "@cat.one": "@diagnostik_image(raw,cat/one.png,@0)",
+    }
+
+
+def run_diff(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["main", "--config", "config.yaml", "--diff"])
+    with pytest.raises(SystemExit) as exit_info:
+        main.main()
+    return exit_info.value.code
+
+
+def test_diff_reports_license_and_atlas_changes(tmp_path, monkeypatch, capsys):
+    (tmp_path / "img" / "Cat").mkdir(parents=True)
+    (tmp_path / "img" / "Cat" / "one.png").write_bytes(
+        b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", 4, 4))
+    (tmp_path / "img" / "Cat" / "LICENSE").write_text("CC0", encoding="utf-8")
+    config = {"repository": "https://github.com/user/repo", "image_extensions": [".png"],
+              "snapshot_file": "snapshot.json"}
+    with open(tmp_path / "config.yaml", "w", encoding="utf-8") as f:
+        yaml.dump(config, f)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["main", "--config", "config.yaml"])
+    main.main()
+    assert run_diff(monkeypatch) == 0
+
+    (tmp_path / "img" / "Cat" / "LICENSE").write_text("CC-BY", encoding="utf-8")
+    assert run_diff(monkeypatch) == 1
+    assert '"macro": "@Cat.license"' in capsys.readouterr().out
+
+    (tmp_path / "img" / "Cat" / "LICENSE").write_text("CC0", encoding="utf-8")
+    with open(tmp_path / "config.yaml", "w", encoding="utf-8") as f:
+        yaml.dump(dict(config, atlas_categories=["Cat"]), f)
+    assert run_diff(monkeypatch) == 1
+    assert '"macro": "@Cat.one"' in capsys.readouterr().out
+    assert not (tmp_path / "atlas").exists()
+
+    # once the atlas is written, the diff takes the same regions from its manifest
+    monkeypatch.setattr(sys, "argv", ["main", "--config", "config.yaml"])
+    main.main()
+    assert run_diff(monkeypatch) == 0
+
+
+def test_diff_writes_no_files(tmp_path, monkeypatch):
+    (tmp_path / "img" / "Cat").mkdir(parents=True)
+    (tmp_path / "img" / "Cat" / "one.png").write_bytes(
+        b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", 4, 4))
+    with open(tmp_path / "config.yaml", "w", encoding="utf-8") as f:
+        yaml.dump({
+            "repository": "https://github.com/user/repo",
+            "image_extensions": [".png"],
+            "snapshot_file": "snapshot.json",
+            "atlas_categories": ["Cat"],
+            "validate_images": "flag",
+            "validation_cache": "vc.json",
+            "checkpoint_file": "checkpoint.json",
+        }, f)
+    monkeypatch.chdir(tmp_path)
+
+    assert run_diff(monkeypatch) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["config.yaml", "img"]
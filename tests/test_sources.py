@@ -0,0 +1,115 @@
+import struct
+
+import pytest
+import yaml
+from liascript_img_makro_gen.confighandler import ConfigLoader
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+
+
+@pytest.fixture
+def two_roots(tmp_path, monkeypatch):
+    """
+    tmp_path/
+      img/Maler/pinsel.png
+      shared/assets/Maler/rolle.png
+    """
+    (tmp_path / "img" / "Maler").mkdir(parents=True)
+    (tmp_path / "img" / "Maler" / "pinsel.png").write_bytes(b"\x89PNG\r\n")
+    (tmp_path / "shared" / "assets" / "Maler").mkdir(parents=True)
+    (tmp_path / "shared" / "assets" / "Maler" / "rolle.png").write_bytes(b"\x89PNG\r\n")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def load(tmp_path, sources, **options):
+    config_file = tmp_path / "config.yaml"
+    with open(config_file, "w", encoding="utf-8") as f:
+        yaml.dump(dict(options, repository="https://github.com/user/main", sources=sources), f)
+    return ConfigLoader(str(config_file)).load_config()
+
+
+def test_sources_are_filled_from_main_config(two_roots):
+    config = load(two_roots, [
+        {"image_folder": "img"},
+        {"image_folder": "shared/assets", "repository": "https://github.com/user/shared",
+         "repository_folder": "/assets", "branch": "stable", "category_prefix": "Shared"},
+    ])
+
+    main, shared = config["sources"]
+    assert main["raw_image_folder"] == "https://raw.githubusercontent.com/user/main/refs/heads/main/img"
+    assert shared["raw_image_folder"] == "https://raw.githubusercontent.com/user/shared/refs/heads/stable/assets"
+    assert shared["category_prefix"] == "Shared"
+
+
+def test_source_without_image_folder_raises(two_roots):
+    with pytest.raises(ValueError, match="image_folder"):
+        load(two_roots, [{"repository": "https://github.com/user/other"}])
+
+
+def test_sources_are_merged_in_order(two_roots):
+    config = load(two_roots, [
+        {"image_folder": "img"},
+        {"image_folder": "shared/assets", "repository": "https://github.com/user/shared",
+         "repository_folder": "assets", "category_prefix": "Shared"},
+    ])
+    gen = LiaScriptMakroGenerator(config)
+    gen.build_document()
+    document = gen.makro_file.build()
+
+    assert "@Maler.pinsel.src: https://raw.githubusercontent.com/user/main/refs/heads/main/img/Maler/pinsel.png" in document
+    assert "@Shared_Maler.rolle.src: https://raw.githubusercontent.com/user/shared/refs/heads/main/assets/Maler/rolle.png" in document
+    assert document.index("### Maler\n") < document.index("### Shared_Maler\n")
+    assert [image["name"] for image in gen.catalog] == ["pinsel", "rolle"]
+    assert gen.makro_file.sections() == ["Maler", "Shared_Maler"]
+
+
+def test_colliding_makros_are_reported(two_roots):
+    (two_roots / "shared" / "assets" / "Maler" / "pinsel.png").write_bytes(b"\x89PNG\r\n")
+    config = load(two_roots, [{"image_folder": "img"}, {"image_folder": "shared/assets"}])
+
+    with pytest.raises(ValueError, match=r"@Maler.pinsel.src \(img and shared/assets\)"):
+        LiaScriptMakroGenerator(config).build_document()
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", width, height)
+
+
+@pytest.fixture
+def two_icon_roots(tmp_path, monkeypatch):
+    """
+    tmp_path/
+      img/Icons/a.png
+      shared/Icons/b.png, c.png
+    """
+    (tmp_path / "img" / "Icons").mkdir(parents=True)
+    (tmp_path / "img" / "Icons" / "a.png").write_bytes(png(4, 4))
+    (tmp_path / "shared" / "Icons").mkdir(parents=True)
+    (tmp_path / "shared" / "Icons" / "b.png").write_bytes(png(4, 4))
+    (tmp_path / "shared" / "Icons" / "c.png").write_bytes(png(2, 2))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_sources_with_the_same_atlas_are_reported(two_icon_roots):
+    config = load(two_icon_roots, [{"image_folder": "img"}, {"image_folder": "shared"}], atlas_categories=["Icons"])
+
+    with pytest.raises(ValueError, match=r"atlas/Icons.svg \(img and shared\)"):
+        LiaScriptMakroGenerator(config).build_document()
+
+
+def test_sources_write_one_atlas_per_prefixed_category(two_icon_roots):
+    config = load(two_icon_roots, [
+        {"image_folder": "img"},
+        {"image_folder": "shared", "repository": "https://github.com/user/shared", "category_prefix": "Shared"},
+    ], atlas_categories=["Icons", "Shared_Icons"])
+    gen = LiaScriptMakroGenerator(config)
+    gen.build_document()
+    document = gen.makro_file.build()
+
+    assert "a.png" in (two_icon_roots / "atlas" / "Icons.json").read_text(encoding="utf-8")
+    shared_manifest = (two_icon_roots / "atlas" / "Shared_Icons.json").read_text(encoding="utf-8")
+    assert "b.png" in shared_manifest and "a.png" not in shared_manifest
+    # the atlas is written to the working tree, so it is linked from the main repository
+    assert "url('https://raw.githubusercontent.com/user/main/refs/heads/main/atlas/Shared_Icons.svg')" in document
+    assert "@Shared_Icons.b.src: https://raw.githubusercontent.com/user/shared/refs/heads/main/shared/Icons/b.png" in document
@@ -60,3 +60,38 @@ def test_is_image_file_with_list():
 )
 def test_clean_filename_various_cases(inp, expected):
     assert clean_filename(inp) == expected
+
+def test_document_builder_build_section():
+    from liascript_img_makro_gen.tools import DocumentBuilder
+    doc = DocumentBuilder()
+    doc.add_to_header("<!--")
+    doc.add_to_body("intro")
+    doc.start_section("one")
+    doc.add_to_header("@one.a: a")
+    doc.add_to_body("### one")
+    doc.start_section("two")
+    doc.add_to_header("")
+    doc.add_to_header("@two.b: b")
+    doc.add_to_body("### two")
+
+    assert doc.sections() == ["one", "two"]
+    assert doc.build_section("one") == "<!--\n@one.a: a\n-->\n### one"
+    assert doc.build_section("two") == "<!--\n@two.b: b\n-->\n### two"
+    with pytest.raises(KeyError):
+        doc.build_section("three")
+
+
+def test_document_builder_sections_with_the_same_name_keep_their_order():
+    from liascript_img_makro_gen.tools import DocumentBuilder
+    doc = DocumentBuilder()
+    # img/A/x/y and img/B/x/y both start a section x_y
+    for name in ("A", "A_x", "x_y", "B", "B_x", "x_y"):
+        doc.start_section(name)
+        doc.add_to_header(f"@{name}.{len(doc.sections())}: i")
+        doc.add_to_body(f"### {name}")
+
+    assert doc.sections() == ["A", "A_x", "x_y", "B", "B_x"]
+    assert doc.build_section("A_x") == "<!--\n@A_x.2: i\n-->\n### A_x"
+    assert doc.build_section("x_y") == "<!--\n@x_y.3: i\n@x_y.5: i\n-->\n### x_y\n### x_y"
+    assert doc.build_section("B", "<!--\nsetup") == "<!--\nsetup\n@B.4: i\n-->\n### B"
+    assert DocumentBuilder.from_dict(doc.to_dict()).build_section("B_x") == doc.build_section("B_x")
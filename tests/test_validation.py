@@ -0,0 +1,82 @@
+import pytest
+from liascript_img_makro_gen.generate_makros import LiaScriptMakroGenerator
+from liascript_img_makro_gen.validation import ImageValidator, matches_signature, matches_trailer
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 40 + b"\x00\x00\x00\x00IEND\xaeB`\x82"
+
+
+@pytest.mark.parametrize("extension, header, expected", [
+    (".png", b"\x89PNG\r\n\x1a\n\x00\x00", True),
+    (".png", b"<!DOCTYPE html>", False),
+    (".jpg", b"\xff\xd8\xff\xe0", True),
+    (".jpeg", b"\x89PNG\r\n\x1a\n", False),
+    (".gif", b"GIF89a", True),
+    (".webp", b"RIFF\x00\x00\x00\x00WEBPVP8 ", True),
+    (".webp", b"RIFF\x00\x00\x00\x00WAVE", False),
+    (".tiff", b"MM\x00*", True),
+    (".png", b"", False),
+    (".svg", b"<svg", True),
+])
+def test_matches_signature(extension, header, expected):
+    assert matches_signature(extension, header) == expected
+
+
+@pytest.mark.parametrize("extension, tail, expected", [
+    (".png", b"\x00\x00\x00\x00IEND\xaeB`\x82", True),
+    (".png", b"\x00IDAT\x00\x00", False),
+    (".jpg", b"\x00\xff\xd9\x00\x00", True),
+    (".jpg", b"\x00\x00\x00", False),
+    (".gif", b"\x00;", True),
+    (".gif", b"\x00\x00", False),
+    (".webp", b"\x00", True),
+])
+def test_matches_trailer(extension, tail, expected):
+    assert matches_trailer(extension, tail) == expected
+
+
+def test_truncated_image_is_invalid(tmp_path):
+    complete, truncated = tmp_path / "complete.png", tmp_path / "truncated.png"
+    complete.write_bytes(PNG)
+    truncated.write_bytes(PNG[:-20])
+
+    validator = ImageValidator()
+    assert validator.validate([complete, truncated]) == {complete: True, truncated: False}
+    validator.close()
+
+
+def test_verdicts_are_cached_by_size_and_mtime(tmp_path, monkeypatch):
+    image = tmp_path / "a.png"
+    image.write_bytes(PNG)
+    cache = tmp_path / "cache.json"
+
+    validator = ImageValidator(cache)
+    assert validator.validate([image]) == {image: True}
+    validator.close()
+
+    # a cached verdict must not read the file again
+    monkeypatch.setattr("liascript_img_makro_gen.validation._check", lambda path: pytest.fail("file was read"))
+    validator = ImageValidator(cache)
+    assert validator.validate([image]) == {image: True}
+    validator.close()
+
+    monkeypatch.undo()
+    image.write_bytes(b"")
+    validator = ImageValidator(cache)
+    assert validator.validate([image]) == {image: False}
+    validator.close()
+
+
+@pytest.mark.parametrize("mode, expected_rows", [("flag", 3), ("exclude", 1)])
+def test_generator_flags_or_excludes_invalid_images(tmp_path, monkeypatch, minimal_config, mode, expected_rows):
+    folder = tmp_path / "img" / "cat"
+    folder.mkdir(parents=True)
+    (folder / "good.png").write_bytes(PNG)
+    (folder / "empty.png").write_bytes(b"")
+    (folder / "page.jpg").write_bytes(b"<html>404</html>")
+    monkeypatch.chdir(tmp_path)
+
+    gen = LiaScriptMakroGenerator(dict(minimal_config, validate_images=mode))
+    gen.process_folders()
+
+    assert sorted(p.name for p in gen.invalid_images) == ["empty.png", "page.jpg"]
+    assert len(gen.catalog) == expected_rows